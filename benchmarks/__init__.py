@@ -0,0 +1,5 @@
+"""
+Benchmarks for the export pipeline
+Run against the simulated Earth Engine backend, no account needed:
+    python -m benchmarks.bench_pipeline --sizes 10 1000 100000
+"""
@@ -0,0 +1,143 @@
+"""
+Throughput benchmark of the export pipeline phases
+Drives date-range planning, region calculation, target comparison, task submission
+and task monitoring of TifDownloader against the simulated backend
+
+Usage:
+    python -m benchmarks.bench_pipeline --sizes 10 1000 100000 --json results.json
+"""
+
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from benchmarks.harness import PhaseRecorder
+from utils.config import Config
+from utils.export_job import build_jobs
+from utils.simulated_backend import SimulatedBackend
+
+
+def build_config(work_dir: Path, args) -> Config:
+    """Config using the simulated backend with fast polling"""
+    yaml_config = {
+        'image_sources': {
+            'nicfi': {'source_name': 'NICFI', 'project_path': 'simulated/nicfi', 'scale_meters': 5},
+            'sentinel': {'source_name': 'SENTINEL-2', 'project_path': 'simulated/sentinel', 'scale_meters': 10}
+        },
+        'Shared_Assets_ID': 'projects/simulated/assets/benchmark',
+        'export_settings': {
+            'region_cache_dir': str(work_dir / 'region_cache'),
+            'runs_dir': str(work_dir / 'runs'),
+            'max_in_flight_tasks': args.max_in_flight,
+            'min_poll_interval': args.poll_interval,
+            'max_poll_interval': args.poll_interval * 10,
+            'submit_workers': args.workers,
+            'min_submit_interval': 0
+        }
+    }
+    return Config.load_from_yaml(io.StringIO(json.dumps(yaml_config)))
+
+
+def build_backend(size: int, args) -> SimulatedBackend:
+    return SimulatedBackend(
+        feature_count=size,
+        latency=args.latency,
+        task_failure_rate=args.task_failure_rate,
+        max_active_tasks=args.quota,
+        task_duration=(60, 600),
+        queue_delay=(0, 30),
+        time_scale=args.time_scale,
+        seed=args.seed
+    )
+
+
+def run_size(recorder: PhaseRecorder, size: int, args):
+    """Run every phase for one target list size"""
+    from utils.tif_downloader import TifDownloader
+
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        config = build_config(work_dir, args)
+        backend = build_backend(size, args)
+        target_indices = list(range(size))
+        auth_file = work_dir / 'simulated-key.json'
+        auth_file.write_text('{}')
+
+        jobs = build_jobs(args.source, ['benchmark'])
+        downloader = TifDownloader(config, auth_file, target_indices, args.start, args.end, jobs[0].source_type,
+                                   backend=backend, jobs=jobs)
+        downloader.initialize_ee()
+
+        with recorder.phase('date_ranges', size) as result:
+            for _ in range(args.plan_repeat):
+                # Date periods are cached per run, clear them so every repeat computes them
+                downloader._date_periods.clear()
+                date_ranges = [downloader.get_date_ranges(args.start, args.end, job.source_type) for job in jobs]
+            result['items'] = sum(map(len, date_ranges)) * args.plan_repeat
+
+        with recorder.phase('total_tasks', size) as result:
+            result['items'] = downloader.calculate_total_tasks()
+
+        with recorder.phase('regions', size, items=size):
+            downloader.prepare_regions()
+
+        target_csv = work_dir / 'targets.csv'
+        with open(target_csv, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Index'])
+            writer.writerows([index] for index in target_indices)
+        with recorder.phase('compare_target', size, items=size):
+            from utils.gee_helper import compare_target_asset
+            compare_target_asset(auth_file, target_csv, config.get_shared_assets_id(), backend=backend)
+
+        with recorder.phase('submission', size) as result:
+            downloader.scheduler.run(
+                downloader.iter_plan(args.start, args.end),
+                lambda job: downloader.create_export_task(*job)
+            )
+            result['items'] = downloader.scheduler.submitted_count
+
+        with recorder.phase('monitoring', size, items=downloader.task_tracker.active_count()):
+            downloader.monitor_tasks()
+
+        downloader.journal.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the export pipeline against the simulated backend")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 1000, 100000], help="Target list sizes")
+    parser.add_argument('--source', nargs='+', default=['nicfi'], choices=['nicfi', 'sentinel'])
+    parser.add_argument('--start', default='2023-01-01')
+    parser.add_argument('--end', default='2023-02-01')
+    parser.add_argument('--plan-repeat', type=int, default=100, help="Repetitions of date-range planning")
+    parser.add_argument('--latency', type=float, default=0.0, help="Simulated seconds per backend call")
+    parser.add_argument('--task-failure-rate', type=float, default=0.0)
+    parser.add_argument('--quota', type=int, default=3000, help="Simulated task queue limit")
+    parser.add_argument('--max-in-flight', type=int, default=2000)
+    parser.add_argument('--time-scale', type=float, default=10000, help="Simulated seconds per real second")
+    parser.add_argument('--poll-interval', type=float, default=0.05, help="Minimum poll interval in seconds")
+    parser.add_argument('--workers', type=int, default=8, help="Submission worker threads")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--no-memory', action='store_true', help="Skip tracemalloc, which slows large runs")
+    parser.add_argument('--json', metavar='FILE', help="Also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    recorder = PhaseRecorder(trace_memory=not args.no_memory)
+    for size in args.sizes:
+        # The pipeline prints a line per task, keep the benchmark output readable
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            run_size(recorder, size, args)
+
+    print(recorder.format_table())
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(recorder.results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Startup benchmark of the GUI
+Measures, in a fresh interpreter per run, the time to import main.py and the time
+until the first window is drawn, and lists the heavy modules loaded by then
+
+Usage:
+    python -m benchmarks.bench_startup --repeat 5 --json startup.json
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Modules only needed once Earth Engine, Drive or a CSV is used
+HEAVY_MODULES = ('ee', 'pandas', 'googleapiclient', 'google.oauth2', 'tkcalendar')
+
+# Runs in the child interpreter, prints one JSON line with its timings
+CHILD_SCRIPT = '''
+import json, sys, time
+start = time.perf_counter()
+eager = {eager!r}
+result = {{'error': None, 'window_seconds': None}}
+for name in eager:
+    try:
+        __import__(name)
+    except ImportError as e:
+        result.setdefault('eager_errors', []).append(str(e))
+import main
+result['import_seconds'] = time.perf_counter() - start
+try:
+    app = main.Application()
+    app.root.update()
+    result['window_seconds'] = time.perf_counter() - start
+    app.root.destroy()
+except Exception as e:
+    result['error'] = f"{{type(e).__name__}}: {{str(e)}}"
+result['heavy_modules'] = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps(result))
+'''
+
+
+def run_once(eager: List[str]) -> Dict[str, Any]:
+    """Start a fresh interpreter, import main.py and open the main window"""
+    script = CHILD_SCRIPT.format(eager=list(eager), heavy=list(HEAVY_MODULES))
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable, '-c', script], cwd=REPO_ROOT, capture_output=True, text=True)
+    process_seconds = time.perf_counter() - start
+
+    lines = completed.stdout.strip().splitlines()
+    try:
+        result = json.loads(lines[-1])
+    except (IndexError, json.JSONDecodeError):
+        error = completed.stderr.strip().splitlines()
+        result = {'error': error[-1] if error else f"exit code {completed.returncode}",
+                  'import_seconds': None, 'window_seconds': None, 'heavy_modules': []}
+    result['process_seconds'] = process_seconds
+    return result
+
+
+def format_table(results: List[Dict[str, Any]]) -> str:
+    """Results and medians as a plain text table"""
+    def seconds(value):
+        return f"{value:.3f}" if value is not None else '-'
+
+    lines = [f"{'run':>5} {'import s':>9} {'window s':>9} {'process s':>10}  heavy modules / error"]
+    for i, result in enumerate(results, 1):
+        detail = result['error'] or ', '.join(result['heavy_modules']) or 'none'
+        lines.append(f"{i:>5} {seconds(result['import_seconds']):>9} {seconds(result['window_seconds']):>9} "
+                     f"{seconds(result['process_seconds']):>10}  {detail}")
+
+    medians = []
+    for key in ('import_seconds', 'window_seconds', 'process_seconds'):
+        values = [result[key] for result in results if result[key] is not None]
+        medians.append(statistics.median(values) if values else None)
+    lines.append(f"{'p50':>5} {seconds(medians[0]):>9} {seconds(medians[1]):>9} {seconds(medians[2]):>10}")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the time to the first window of the GUI")
+    parser.add_argument('--repeat', type=int, default=5, help="Number of fresh interpreters to start")
+    parser.add_argument('--eager', nargs='*', default=[], metavar='MODULE',
+                        help="Import these modules before main.py, e.g. --eager ee pandas googleapiclient.discovery "
+                             "to compare against loading them at startup")
+    parser.add_argument('--json', metavar='FILE', help="Also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    results = [run_once(args.eager) for _ in range(args.repeat)]
+    print(format_table(results))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
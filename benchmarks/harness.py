@@ -0,0 +1,54 @@
+"""
+Benchmark harness
+Times each phase and records its peak traced memory
+"""
+
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, List
+
+
+class PhaseRecorder:
+    """Collect wall time, throughput and peak memory per benchmark phase"""
+
+    def __init__(self, trace_memory: bool = True):
+        self.trace_memory = trace_memory
+        self.results: List[Dict[str, Any]] = []
+
+    @contextmanager
+    def phase(self, name: str, size: int, items: int = 0):
+        """
+        Time a phase
+        Args:
+            name: Phase name
+            size: Number of target indices of the run
+            items: Number of items processed, used for items/second; can be updated on the yielded dict
+        """
+        result = {'phase': name, 'size': size, 'items': items, 'error': None}
+        if self.trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            yield result
+        except Exception as e:
+            result['error'] = f"{type(e).__name__}: {str(e)}"
+        finally:
+            result['seconds'] = time.perf_counter() - start
+            if self.trace_memory:
+                result['peak_mb'] = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+                tracemalloc.stop()
+            else:
+                result['peak_mb'] = None
+            result['items_per_second'] = result['items'] / result['seconds'] if result['items'] and result['seconds'] and not result['error'] else None
+            self.results.append(result)
+
+    def format_table(self) -> str:
+        """Results as a plain text table"""
+        lines = [f"{'size':>8} {'phase':<18} {'seconds':>10} {'items':>9} {'items/s':>11} {'peak MB':>9}  error"]
+        for result in self.results:
+            items_per_second = f"{result['items_per_second']:.1f}" if result['items_per_second'] else '-'
+            peak_mb = f"{result['peak_mb']:.1f}" if result['peak_mb'] is not None else '-'
+            lines.append(f"{result['size']:>8} {result['phase']:<18} {result['seconds']:>10.3f} {result['items']:>9} "
+                         f"{items_per_second:>11} {peak_mb:>9}  {result['error'] or ''}")
+        return '\n'.join(lines)
@@ -0,0 +1,4 @@
+"""
+Headless command-line runner for GEE exports
+Usage: python -m geeexp --help
+"""
@@ -0,0 +1,198 @@
+"""
+Command-line entry point for running GEE exports without the Tkinter GUI
+Progress is written to stdout as JSON lines, other console output goes to stderr
+"""
+
+import argparse
+import contextlib
+import json
+import sys
+from datetime import datetime
+
+from utils.auth_validator import validate_auth_file
+from utils.config import Config
+from utils.config_validator import validate_config
+from utils.export_account import build_credentials
+from utils.export_job import build_jobs
+from utils.file_manager import FileManager
+
+
+# Exit codes
+EXIT_OK = 0
+EXIT_EXPORT_FAILED = 1
+EXIT_INVALID_INPUT = 2
+EXIT_AUTH_FAILED = 3
+EXIT_TASKS_FAILED = 4
+
+
+class ProgressWriter:
+    """Write progress events as JSON lines"""
+
+    def __init__(self, stream, json_output=True):
+        self.stream = stream
+        self.json_output = json_output
+
+    def emit(self, event, **fields):
+        if self.json_output:
+            entry = {'time': datetime.now().isoformat(timespec='seconds'), 'event': event, **fields}
+            self.stream.write(json.dumps(entry, default=str) + '\n')
+        else:
+            message = fields.pop('message', '')
+            details = ', '.join(f"{key}: {value}" for key, value in fields.items())
+            self.stream.write(f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - {event} {message} {details}".rstrip() + '\n')
+        self.stream.flush()
+
+    def log(self, message):
+        self.emit('log', message=message.strip())
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m geeexp', description="Export GEE imagery to Google Drive without the GUI")
+    parser.add_argument('--auth', nargs='+',
+                        help="Google Cloud service account JSON file, or several to spread the tasks over their "
+                             "task limits")
+    parser.add_argument('--project', nargs='+', default=None,
+                        help="Google Cloud project of the Earth Engine requests, one for all auth files or one per "
+                             "auth file, defaults to the project of each auth file")
+    parser.add_argument('--config', help="YAML configuration file")
+    parser.add_argument('--targets', help="CSV file with the target indices in the first column")
+    parser.add_argument('--start', help="Start date, YYYY-MM-DD")
+    parser.add_argument('--end', help="End date, YYYY-MM-DD")
+    parser.add_argument('--source', nargs='+', help="Image source types from the config, e.g. nicfi sentinel")
+    parser.add_argument('--folder', nargs='+',
+                        help="Google Drive folder name to save the exports to, or one folder per source")
+    parser.add_argument('--skip-existing', action='store_true', default=None,
+                        help="Skip exports already in the Drive folder")
+    parser.add_argument('--order', choices=['date', 'index', 'priority'], default=None,
+                        help="Task order: every index per period (date), every period per index (index), or "
+                             "index by index sorted by the --priority-column of the targets CSV (priority)")
+    parser.add_argument('--priority-column', default=None,
+                        help="Column of the targets CSV with the priority of each index, lower first")
+    parser.add_argument('--resume', metavar='RUN_DIR', help="Resume an interrupted run from its journal directory")
+    parser.add_argument('--progress', choices=['json', 'text'], default='json', help="Progress output format")
+    parser.add_argument('--backend', choices=['ee', 'simulated'], default=None,
+                        help="Earth Engine backend, 'simulated' runs offline for load testing")
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help="Serve Prometheus metrics on http://127.0.0.1:PORT/metrics during the run")
+    parser.add_argument('--profile', nargs='*', choices=['cprofile', 'tracemalloc'], default=None,
+                        help="Write a per-phase time breakdown to the run directory, optionally with cProfile "
+                             "and tracemalloc")
+    args = parser.parse_args(argv)
+
+    if not args.resume:
+        missing = [name for name in ('auth', 'config', 'targets', 'start', 'end', 'source', 'folder')
+                   if getattr(args, name) is None]
+        if missing:
+            parser.error(f"missing required arguments: {', '.join('--' + name for name in missing)}")
+    return args
+
+
+def validate_dates(start_date, end_date):
+    """Check the date range format, raising ValueError if invalid"""
+    start = datetime.strptime(start_date, '%Y-%m-%d')
+    end = datetime.strptime(end_date, '%Y-%m-%d')
+    if end <= start:
+        raise ValueError("End date must be after start date")
+
+
+def build_downloader(args, progress):
+    """Validate the inputs and build the TifDownloader"""
+    from utils.tif_downloader import TifDownloader
+
+    if args.resume:
+        return TifDownloader.from_journal(args.resume, log_callback=progress.log, backend=args.backend)
+
+    if args.backend != 'simulated':
+        for auth_file in args.auth:
+            validate_auth_file(auth_file)
+    credentials = build_credentials(args.auth, args.project)
+    is_valid, error_message, _ = validate_config(args.config)
+    if not is_valid:
+        raise ValueError(error_message)
+    validate_dates(args.start, args.end)
+
+    config = Config.load_from_yaml(args.config)
+    for source_type in args.source:
+        if source_type not in config.get_image_sources():
+            raise ValueError(f"Unknown source type '{source_type}', expected one of {list(config.get_image_sources())}")
+    jobs = build_jobs(args.source, args.folder)
+
+    file_manager = FileManager()
+    file_manager.load_target_list(args.targets)
+    target_indices = file_manager.get_target_indices()
+    export_settings = config.get_export_settings()
+    plan_order = args.order or export_settings.get('plan_order', 'date')
+    priorities = None
+    if plan_order == 'priority':
+        priorities = file_manager.get_target_priorities(
+            args.priority_column or export_settings.get('plan_priority_column', 'priority'))
+
+    downloader = TifDownloader(
+        config=config,
+        auth_file=args.auth[0],
+        target_indices=target_indices,
+        start_date=args.start,
+        end_date=args.end,
+        source_type=jobs[0].source_type,
+        log_callback=progress.log,
+        skip_existing=args.skip_existing,
+        backend=args.backend,
+        jobs=jobs,
+        plan_order=plan_order,
+        priorities=priorities,
+        credentials=credentials
+    )
+    return downloader
+
+
+def run(args, progress):
+    """Run the export, returning the exit code"""
+    try:
+        downloader = build_downloader(args, progress)
+    except Exception as e:
+        progress.emit('error', message=f"Invalid input: {str(e)}")
+        return EXIT_INVALID_INPUT
+    if args.metrics_port is not None:
+        downloader.metrics_port = args.metrics_port
+    if args.profile is not None:
+        downloader.enable_profiling('cprofile' in args.profile, 'tracemalloc' in args.profile)
+
+    try:
+        downloader.initialize_ee()
+    except Exception as e:
+        progress.emit('error', message=str(e))
+        return EXIT_AUTH_FAILED
+
+    progress.emit('start', run_dir=str(downloader.journal.run_dir),
+                  sources={job.source_type: job.folder_name for job in downloader.jobs},
+                  total_tasks=downloader.all_task_count, accounts=len(downloader.accounts))
+    try:
+        if args.resume:
+            downloader.resume()
+        else:
+            downloader.start_export(args.start, args.end)
+    except Exception as e:
+        progress.emit('error', message=f"Export failed: {str(e)}")
+        return EXIT_EXPORT_FAILED
+
+    task_states = downloader.task_summary()
+    # Failed tasks that were retried successfully do not count, only tasks given up on
+    failed = len(downloader.dead_letters)
+    exit_code = EXIT_TASKS_FAILED if failed else EXIT_OK
+    progress.emit('finished', exit_code=exit_code, submitted=downloader.current_task_index,
+                  failed=failed, retried=sum(downloader.task_attempts.values()), task_states=task_states,
+                  metrics=str(downloader.metrics_file))
+    return exit_code
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    progress = ProgressWriter(sys.stdout, json_output=args.progress == 'json')
+
+    # Keep stdout for progress events, console messages from the export go to stderr
+    with contextlib.redirect_stdout(sys.stderr):
+        return run(args, progress)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,10 +3,9 @@ from utils.file_manager import FileManager
 from utils.config_validator import validate_config
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-from utils.config import config, Config
-from utils.gee_helper import return_assets_size
-import tkcalendar
-from datetime import datetime
+from utils.config import Config, get_default_config
+from utils.tk_executor import TkExecutor
+from utils.log_sink import QueueLogSink
 
 
 
@@ -69,13 +68,16 @@ class Application:
     def __init__(self):
         self.root = tk.Tk()
         self.file_manager = FileManager()
-        self.config = config
+        self.config = get_default_config()
         self.files_loaded = {
             'auth': False,
             'config': False,
             'target': False
         }
         self.available_folders = []
+        self.target_comparison = None
+        self.executor = TkExecutor(self.root)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         self.setup_gui()
 
     def setup_gui(self):
@@ -120,6 +122,13 @@ class Application:
         log_scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
         self.log_text.configure(yscrollcommand=log_scrollbar.set)
 
+        # Queue log messages from the export thread, the widget is updated in batches
+        self.log_sink = QueueLogSink(
+            self.root,
+            self.log_text,
+            max_lines=self.config.get_export_settings().get('log_max_lines', 5000)
+        )
+
         # Add status bar at the bottom
         self.status_var = tk.StringVar()
         self.status_bar = ttk.Label(
@@ -135,7 +144,7 @@ class Application:
     # Update the status bar
     def update_status(self, message):
         self.status_var.set(message)
-        self.root.update()
+        self.root.update_idletasks()
 
     def setup_file_loading_section(self, parent):
         # Configure grid weights for resizing
@@ -181,7 +190,7 @@ class Application:
         # Create listbox for Drive folders with scrollbar
         self.folders_listbox = tk.Listbox(
             folders_frame, 
-            selectmode=tk.SINGLE,
+            selectmode=tk.EXTENDED,  # one folder for all sources, or one per selected source
             height=10,  # Increased height since we removed assets listbox
             width=50,
             exportselection=0
@@ -210,7 +219,7 @@ class Application:
         # Create listbox for sources with scrollbar
         self.sources_listbox = tk.Listbox(
             source_info_frame,
-            selectmode=tk.SINGLE,
+            selectmode=tk.EXTENDED,  # several sources are exported in one run
             height=3,
             width=30,
             exportselection=0
@@ -298,6 +307,14 @@ class Application:
             row=1, column=2, padx=5, pady=5
         )
 
+        # Skip Existing Row
+        self.skip_existing_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            time_frame,
+            text="Skip files already in the Drive folder",
+            variable=self.skip_existing_var
+        ).grid(row=2, column=0, columnspan=3, padx=5, pady=5, sticky=tk.W)
+
         # Start Export Button (moved to row 6)
         self.next_button = ttk.Button(
             parent, 
@@ -322,7 +339,8 @@ class Application:
         top.transient(self.root)
         top.grab_set()
         
-        # Add calendar
+        # Add calendar, tkcalendar is imported when the first date dialog opens
+        import tkcalendar
         cal = tkcalendar.Calendar(top,
                                  selectmode='day',
                                  date_pattern='y-mm-dd')
@@ -353,38 +371,39 @@ class Application:
         except Exception as e:
             self.show_error("Error", f"Failed to update source list: {str(e)}")
 
+    def get_selected_source_types(self):
+        """Source types of the selected sources, in list order"""
+        sources = self.config.get_image_sources()
+        source_types = []
+        for selection in self.sources_listbox.curselection():
+            # Find source type by name
+            source_name = self.sources_listbox.get(selection)
+            for s_type, s_info in sources.items():
+                if s_info.get('source_name') == source_name:
+                    source_types.append(s_type)
+                    break
+        return source_types
+
     def on_source_select(self, event):
         """Handle source selection event"""
         try:
-            selection = self.sources_listbox.curselection()
-            if not selection:
+            source_types = self.get_selected_source_types()
+            if not source_types:
                 return
-            
-            # Get selected source type
-            source_name = self.sources_listbox.get(selection[0])
-            sources = self.config.get_image_sources()
-            
-            # Find source info by name
-            source_info = None
-            source_type = None
-            for s_type, s_info in sources.items():
-                if s_info.get('source_name') == source_name:
-                    source_info = s_info
-                    source_type = s_type
-                    break
-                    
-            if source_info:
-                # Update text area with source details
-                self.source_info_text.config(state='normal')
-                self.source_info_text.delete(1.0, tk.END)
-                
-                info_text = f"Source Type: {source_type.upper()}\n"
+
+            # Update text area with the details of every selected source
+            self.source_info_text.config(state='normal')
+            self.source_info_text.delete(1.0, tk.END)
+
+            info_text = ""
+            for source_type in source_types:
+                info_text += f"Source Type: {source_type.upper()}\n"
                 info_text += f"Name: {self.config.get_source_name(source_type)}\n"
                 info_text += f"Project Path: {self.config.get_project_path(source_type)}\n"
-                info_text += f"Scale: {self.config.get_scale_meters(source_type)} meters\n"
-                
-                self.source_info_text.insert(tk.END, info_text)
-                self.source_info_text.config(state='disabled')
+                info_text += f"Scale: {self.config.get_scale_meters(source_type)} meters\n\n"
+
+            self.source_info_text.insert(tk.END, info_text.rstrip() + "\n")
+            self.source_info_text.config(state='disabled')
                 
         except Exception as e:
             self.show_error("Error", f"Failed to update source information: {str(e)}")
@@ -416,88 +435,109 @@ class Application:
                 # First validate the JSON structure
                 from utils.auth_validator import validate_auth_file, check_auth_file
                 validate_auth_file(auth_path)
+
+                # Drop the sessions of the previous key file, a replaced file may keep the same path
+                from utils.session import clear_sessions
+                clear_sessions()
                 
                 # Update status for validation
                 self.update_status("Validating authentication and checking access...")
+                self.auth_button.config(state='disabled')
                 
-                # Then check Drive and EE access
-                if check_auth_file(auth_path):
-                    if self.file_manager.load_auth_file(auth_path):
-                        self.auth_filename.config(text=Path(auth_path).name)
-                        self.files_loaded['auth'] = True
-                        self.config_button.config(state='normal')
-                        
-                        # Update status for folder loading
-                        self.update_status("Loading available folders from Google Drive...")
-                        
-                        # Update available folders
-                        self.update_available_folders()
-                        
-                        self.update_progress()
-                        self.update_status("Authentication complete - folders loaded successfully")
-                    else:
-                        self.update_status("Error: Failed to store authentication file")
-                        self.show_error("Error", "Failed to store authentication file")
-                else:
-                    self.update_status("Error: Failed to validate access")
-                    self.show_error("Error", "Failed to validate Google Drive or Earth Engine access")
+                # Then check Drive and EE access in the background
+                self.executor.submit(
+                    'auth', check_auth_file, auth_path,
+                    on_success=lambda is_valid: self.on_auth_checked(auth_path, is_valid),
+                    on_error=self.on_auth_error
+                )
             except ValueError as e:
                 self.update_status(f"Error: {str(e)}")
                 self.show_error("Error", str(e))
             except Exception as e:
-                self.update_status(f"Error: Unexpected error during authentication")
-                self.show_error("Error", f"Unexpected error during authentication: {str(e)}")
+                self.on_auth_error(e)
+
+    def on_auth_checked(self, auth_path, is_valid):
+        """Handle the result of the background authentication check"""
+        self.auth_button.config(state='normal')
+        if is_valid:
+            if self.file_manager.load_auth_file(auth_path):
+                self.auth_filename.config(text=Path(auth_path).name)
+                self.files_loaded['auth'] = True
+                self.config_button.config(state='normal')
+                
+                # Update status for folder loading
+                self.update_status("Loading available folders from Google Drive...")
+                
+                # Update available folders
+                self.update_available_folders()
+                
+                self.update_progress()
+            else:
+                self.update_status("Error: Failed to store authentication file")
+                self.show_error("Error", "Failed to store authentication file")
+        else:
+            self.update_status("Error: Failed to validate access")
+            self.show_error("Error", "Failed to validate Google Drive or Earth Engine access")
+
+    def on_auth_error(self, error):
+        self.auth_button.config(state='normal')
+        self.update_status(f"Error: Unexpected error during authentication")
+        self.show_error("Error", f"Unexpected error during authentication: {str(error)}")
 
     def update_available_folders(self):
         """Update available folders from Google Drive"""
         try:
-            # Clear existing items
-            self.folders_listbox.delete(0, tk.END)
-            
-            # Enable listbox
-            self.folders_listbox.config(state='normal')
-            
             if not self.file_manager.input_files or not self.file_manager.input_files.auth_file:
                 raise ValueError("Auth file not loaded in file manager")
                 
             # Update status
             self.update_status("Retrieving folders...")
             
-            # Get available folders from Google Drive
+            # Get available folders from Google Drive in the background
             from utils.auth_validator import return_all_folders_with_id
             auth_file_path = str(self.file_manager.input_files.auth_file)
-            
-            # Load Drive folders
-            self.available_folders = return_all_folders_with_id(auth_file_path)
-            
-            # Store folder info as dictionary for easy lookup
-            self.folder_info = {}
-            for folder_with_id in self.available_folders:
-                # Split folder name and ID
-                folder_name = folder_with_id.split(" (")[0]
-                self.folder_info[folder_name] = folder_with_id
-                # Display only folder name in listbox
-                self.folders_listbox.insert(tk.END, folder_name)
-            
-            # Check folders
-            if not self.available_folders:
-                self.update_status("Warning: No Drive folders found")
-                self.show_warning("Warning", "No Google Drive folders found")
-            else:
-                self.update_status("Folders loaded successfully")
+            self.executor.submit(
+                'folders', return_all_folders_with_id, auth_file_path,
+                on_success=self.on_folders_loaded,
+                on_error=self.on_folders_error
+            )
                 
         except Exception as e:
-            self.update_status(f"Error: Failed to load folders")
-            self.show_error("Error", f"Failed to load folders: {str(e)}")
-            self.folders_listbox.config(state='disabled')
+            self.on_folders_error(e)
+
+    def on_folders_loaded(self, folders):
+        """Fill the folders listbox with the folders loaded from Google Drive"""
+        # Clear existing items
+        self.folders_listbox.config(state='normal')
+        self.folders_listbox.delete(0, tk.END)
+        
+        self.available_folders = folders
+        
+        # Store folder info as dictionary for easy lookup
+        self.folder_info = {}
+        for folder_with_id in self.available_folders:
+            # Split folder name and ID
+            folder_name = folder_with_id.split(" (")[0]
+            self.folder_info[folder_name] = folder_with_id
+            # Display only folder name in listbox
+            self.folders_listbox.insert(tk.END, folder_name)
+        
+        # Check folders
+        if not self.available_folders:
+            self.update_status("Warning: No Drive folders found")
+            self.show_warning("Warning", "No Google Drive folders found")
+        else:
+            self.update_status("Authentication complete - folders loaded successfully")
+
+    def on_folders_error(self, error):
+        self.update_status(f"Error: Failed to load folders")
+        self.show_error("Error", f"Failed to load folders: {str(error)}")
+        self.folders_listbox.config(state='disabled')
 
     def get_selected_folders(self):
-        # Get selected folder
+        # Get selected folders
         folder_selection = self.folders_listbox.curselection()
-        
-        if folder_selection:
-            return [self.available_folders[folder_selection[0]]]
-        return []
+        return [self.available_folders[selection] for selection in folder_selection]
 
     def load_config(self):
         config_path = filedialog.askopenfilename(
@@ -507,7 +547,6 @@ class Application:
         if config_path:
             try:
                 from utils.config_validator import validate_config
-                from utils.gee_helper import return_assets_size
                 
                 # Validate configuration file
                 is_valid, error_message, yaml_content = validate_config(config_path)
@@ -550,28 +589,35 @@ class Application:
             if not shared_asset_id:
                 return
             
-            # Get asset size using GEE helper
-            auth_file_path = str(self.file_manager.input_files.auth_file)
-            asset_size = return_assets_size(auth_file_path, shared_asset_id)
-            
-            # Update text widget with asset information
-            self.shared_asset_text.config(state='normal')
-            self.shared_asset_text.delete(1.0, tk.END)
+            self.set_shared_asset_text(f"Shared Asset ID: {shared_asset_id}\nNumber of Features: loading...\n")
             
-            info_text = f"Shared Asset ID: {shared_asset_id}\n"
-            info_text += f"Number of Features: {asset_size}\n"
-            
-            self.shared_asset_text.insert(tk.END, info_text)
-            self.shared_asset_text.config(state='disabled')
-            
-            self.update_status("Shared asset information updated successfully")
+            # Get asset size using GEE helper in the background
+            from utils.gee_helper import return_assets_size
+            auth_file_path = str(self.file_manager.input_files.auth_file)
+            self.executor.submit(
+                'shared_asset', return_assets_size, auth_file_path, shared_asset_id,
+                on_success=lambda asset_size: self.on_shared_asset_loaded(shared_asset_id, asset_size),
+                on_error=self.on_shared_asset_error
+            )
             
         except Exception as e:
-            self.show_error("Error", f"Failed to update shared asset information: {str(e)}")
-            self.shared_asset_text.config(state='normal')
-            self.shared_asset_text.delete(1.0, tk.END)
-            self.shared_asset_text.insert(tk.END, "Failed to load shared asset information")
-            self.shared_asset_text.config(state='disabled')
+            self.on_shared_asset_error(e)
+
+    def on_shared_asset_loaded(self, shared_asset_id, asset_size):
+        info_text = f"Shared Asset ID: {shared_asset_id}\n"
+        info_text += f"Number of Features: {asset_size}\n"
+        self.set_shared_asset_text(info_text)
+        self.update_status("Shared asset information updated successfully")
+
+    def on_shared_asset_error(self, error):
+        self.show_error("Error", f"Failed to update shared asset information: {str(error)}")
+        self.set_shared_asset_text("Failed to load shared asset information")
+
+    def set_shared_asset_text(self, text):
+        self.shared_asset_text.config(state='normal')
+        self.shared_asset_text.delete(1.0, tk.END)
+        self.shared_asset_text.insert(tk.END, text)
+        self.shared_asset_text.config(state='disabled')
 
 
 
@@ -596,8 +642,7 @@ class Application:
                 
                 if self.file_manager.load_target_list(target_path):
                     self.target_filename.config(text=Path(target_path).name)
-                    self.files_loaded['target'] = True
-                    self.update_progress()
+                    self.target_comparison = None
                     
                     # Get shared asset ID from config
                     shared_asset_id = self.config.get_shared_assets_id()
@@ -611,43 +656,47 @@ class Application:
                     auth_file_path = str(self.file_manager.input_files.auth_file)
                     
                     # Show loading message in comparison text
-                    self.target_comparison_text.config(state='normal')
-                    self.target_comparison_text.delete(1.0, tk.END)
-                    self.target_comparison_text.insert(tk.END, "Comparing target list with shared asset...")
-                    self.target_comparison_text.config(state='disabled')
+                    self.set_target_comparison_text("Comparing target list with shared asset...")
                     
-                    # Compare target with shared asset
+                    # Compare target with shared asset in the background
                     from utils.gee_helper import compare_target_asset
-                    comparison_result = compare_target_asset(
-                        auth_file_path,
-                        target_path,
-                        shared_asset_id
+                    self.executor.submit(
+                        'target_comparison', compare_target_asset,
+                        auth_file_path, target_path, shared_asset_id,
+                        on_success=self.on_target_compared,
+                        on_error=self.on_target_error
                     )
                     
-                    # Update comparison results
-                    self.target_comparison_text.config(state='normal')
-                    self.target_comparison_text.delete(1.0, tk.END)
-                    self.target_comparison_text.insert(tk.END, comparison_result)
-                    self.target_comparison_text.config(state='disabled')
-                    
-                    self.update_status("Target list loaded and compared successfully")
-
-                    self.files_loaded['target'] = True
-                    self.update_progress()
-                    
                 else:
                     raise ValueError("Failed to load target list")
                     
             except Exception as e:
-                self.show_error("Error", str(e))
-                self.target_filename.config(text="No file selected")
-                self.files_loaded['target'] = False
-                
-                # Clear comparison results
-                self.target_comparison_text.config(state='normal')
-                self.target_comparison_text.delete(1.0, tk.END)
-                self.target_comparison_text.insert(tk.END, "Failed to compare target list")
-                self.target_comparison_text.config(state='disabled')
+                self.on_target_error(e)
+
+    def on_target_compared(self, comparison):
+        """Show the result of the background target comparison"""
+        self.target_comparison = comparison
+        self.set_target_comparison_text(comparison.summary())
+        
+        self.update_status("Target list loaded and compared successfully")
+
+        self.files_loaded['target'] = True
+        self.update_progress()
+
+    def on_target_error(self, error):
+        self.show_error("Error", str(error))
+        self.target_filename.config(text="No file selected")
+        self.files_loaded['target'] = False
+        self.target_comparison = None
+        
+        # Clear comparison results
+        self.set_target_comparison_text("Failed to compare target list")
+
+    def set_target_comparison_text(self, text):
+        self.target_comparison_text.config(state='normal')
+        self.target_comparison_text.delete(1.0, tk.END)
+        self.target_comparison_text.insert(tk.END, text)
+        self.target_comparison_text.config(state='disabled')
 
 
 
@@ -670,27 +719,24 @@ class Application:
                 self.show_error("Export Error", "Please select an image source from the available sources list")
                 return False
 
+            if len(folder_selection) not in (1, len(source_selection)):
+                self.show_error("Export Error",
+                    "Please select one destination folder for all sources, or one folder per selected source")
+                return False
+
             # 3. Check target comparison results
-            comparison_text = self.target_comparison_text.get(1.0, tk.END).strip()
-            if not comparison_text:
+            if self.target_comparison is None:
                 self.show_error("Export Error", "No target comparison results available")
                 return False
 
-            # Parse the comparison results to get the match count
-            try:
-                # Extract the number of matches from the comparison text
-                # Expected format: "Number of target values found in shared asset: X"
-                for line in comparison_text.split('\n'):
-                    if "found in shared asset:" in line:
-                        match_count = int(line.split(':')[1].strip())
-                        if match_count <= 0:
-                            self.show_error("Export Error", 
-                                "No matching features found between target list and shared asset")
-                            return False
-                        break
-            except (ValueError, IndexError):
+            if not self.target_comparison.field_exists:
                 self.show_error("Export Error", 
-                    "Unable to determine the number of matching features")
+                    f"Field '{self.target_comparison.target_field}' does not exist in the shared asset")
+                return False
+
+            if self.target_comparison.matched_count <= 0:
+                self.show_error("Export Error", 
+                    "No matching features found between target list and shared asset")
                 return False
 
             # 4. Check date selections
@@ -752,29 +798,22 @@ class Application:
     def proceed_to_next_step(self):
         if self.check_export_conditions():
             try:
-                # Get selected source type
-                source_selection = self.sources_listbox.curselection()
-                source_name = self.sources_listbox.get(source_selection[0])
-                
-                # Find source type from config based on source name
-                source_type = None
-                for s_type, s_info in self.config.get_image_sources().items():
-                    if s_info.get('source_name') == source_name:
-                        source_type = s_type
-                        break
-                
-                if not source_type:
+                # Get selected source types
+                source_types = self.get_selected_source_types()
+                if not source_types:
                     raise ValueError("Could not determine source type")
 
-                # Get selected folder name only
-                folder_selection = self.folders_listbox.curselection()
-                folder_name = self.folders_listbox.get(folder_selection[0])  # This now gets just the name
-                
-                # Get full folder info for logging (optional)
-                folder_with_id = self.folder_info.get(folder_name, folder_name)
+                # Get selected folder names only
+                folder_names = [self.folders_listbox.get(selection) for selection in self.folders_listbox.curselection()]
+
+                # Pair sources with folders, one folder for all sources or one folder per source in list order
+                from utils.export_job import build_jobs
+                jobs = build_jobs(source_types, folder_names)
 
                 # Update log with full folder information
-                self.update_log(f"Selected export folder: {folder_with_id}")
+                for job in jobs:
+                    self.update_log(f"Selected export folder for {job.source_type}: "
+                                    f"{self.folder_info.get(job.folder_name, job.folder_name)}")
                 
                 # Get date range
                 start_date = self.start_date.get().strip()
@@ -788,6 +827,13 @@ class Application:
                 
                 if not target_indices:
                     raise ValueError("No target indices found in the CSV file")
+
+                # Priority order reads the priority of every index from a column of the target list
+                export_settings = self.config.get_export_settings()
+                priorities = None
+                if export_settings.get('plan_order', 'date') == 'priority':
+                    priorities = self.file_manager.get_target_priorities(
+                        export_settings.get('plan_priority_column', 'priority'))
                 
                 # Get auth file path (convert WindowsPath to string)
                 auth_file = str(self.file_manager.input_files.auth_file)
@@ -799,12 +845,13 @@ class Application:
                 print("--------------------------------")
 
                 # Update status and log
-                self.update_status(f"Initializing export for {source_type} imagery...")
-                self.update_log(f"Starting export process for {source_type}")
+                source_list = ', '.join(source_types)
+                self.update_status(f"Initializing export for {source_list} imagery...")
+                self.update_log(f"Starting export process for {source_list}")
                 self.update_log(f"Date range: {start_date} to {end_date}")
-                self.update_log(f"Target folder: {folder_name}")
+                self.update_log(f"Target folders: {', '.join(dict.fromkeys(folder_names))}")
                 self.update_log(f"Number of indices: {len(target_indices)}")
-                self.update_log(f"Source type: {source_type}")
+                self.update_log(f"Source types: {source_list}")
 
                 # Create TifDownloader instance with clean folder name
                 from utils.tif_downloader import TifDownloader
@@ -814,30 +861,33 @@ class Application:
                     target_indices=target_indices,
                     start_date=start_date,
                     end_date=end_date,
-                    source_type=source_type,
-                    log_callback=self.update_log
+                    source_type=jobs[0].source_type,
+                    log_callback=self.update_log,
+                    skip_existing=self.skip_existing_var.get(),
+                    jobs=jobs,
+                    priorities=priorities
                 )
 
-                # Initialize Earth Engine
-                self.update_log("Initializing Earth Engine...")
-                downloader.initialize_ee()
+                # Keep the full log of the run next to its task journal
+                if self.config.get_export_settings().get('log_to_file', True):
+                    self.log_sink.set_log_file(downloader.journal.run_dir / 'export.log')
 
-                # Start export in a separate thread
+                # Initialize Earth Engine and start export in a separate thread
                 import threading
                 def export_thread():
                     try:
+                        self.update_log("Initializing Earth Engine...")
+                        downloader.initialize_ee()
                         downloader.start_export(
                             start_date=start_date,
-                            end_date=end_date,
-                            source_type=source_type,
-                            folder_name=folder_name,
+                            end_date=end_date
                         )
-                        self.update_status("Export completed successfully")
+                        self.executor.call_in_main(self.update_status, "Export completed successfully")
                         self.update_log("Export process has been completed successfully!")
                     except Exception as e:
-                        self.update_status("Export failed")
+                        self.executor.call_in_main(self.update_status, "Export failed")
                         self.update_log(f"Export failed: {str(e)}")
-                        self.show_error("Export Error", str(e))
+                        self.executor.call_in_main(self.show_error, "Export Error", str(e))
 
                 thread = threading.Thread(target=export_thread)
                 thread.daemon = True
@@ -853,15 +903,18 @@ class Application:
 
     # Add a new method to update the log
     def update_log(self, message):
-        """Update the log text widget with a new message"""
-        self.log_text.config(state='normal')
-        self.log_text.insert(tk.END, f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - {message}\n")
-        self.log_text.see(tk.END)  # Scroll to bottom
-        self.log_text.config(state='disabled')
+        """Queue a message for the log text widget, safe to call from any thread"""
+        self.log_sink.write(message)
 
     def run(self):
         self.root.mainloop()
 
+    def on_close(self):
+        """Cancel background operations and close the window"""
+        self.executor.shutdown()
+        self.log_sink.close()
+        self.root.destroy()
+
     def center_dialog(self, dialog):
         """Center the dialog window on the parent"""
         dialog.update_idletasks()
@@ -1,15 +1,13 @@
 #this is the script to validate the google cloud authentication file
 
 import os
-from google.oauth2 import service_account
-import ee
-
-SCOPES = ['https://www.googleapis.com/auth/drive', 'https://www.googleapis.com/auth/earthengine']
+import re
+from utils.session import get_session
 
 
 def get_credentials(file_path):
     """Get credentials from service account key file"""
-    return service_account.Credentials.from_service_account_file(file_path, scopes=SCOPES)
+    return get_session(file_path).credentials
 
 
 
@@ -35,27 +33,14 @@ def validate_auth_file(file_path):
 def check_auth_file(file_path):
     try:
         # Validate JSON structure
-        credentials = validate_auth_file(file_path)
+        validate_auth_file(file_path)
         
         # Verify Google Drive access
-        from google.oauth2 import service_account
-        from googleapiclient.discovery import build
-        
-
-        credentials = service_account.Credentials.from_service_account_file(
-            file_path, scopes=SCOPES)
-        
-        drive_service = build('drive', 'v3', credentials=credentials)
-        # Test API call
-        drive_service.files().list(pageSize=1).execute()
+        session = get_session(file_path)
+        session.drive_service.files().list(pageSize=1).execute()
         
         # Verify Earth Engine access
-        import ee
-        credentials = ee.ServiceAccountCredentials(credentials.service_account_email, file_path)
-        ee.Initialize(credentials)
-        
-        # Test EE access by making a simple API call
-        ee.Number(1).getInfo()
+        session.initialize_ee()
         
         print("Authentication file is valid and has access to Google Drive and Earth Engine")
         return True
@@ -67,16 +52,8 @@ def check_auth_file(file_path):
 def return_all_folders_with_id(file_path):
     """Return list of available Google Drive folders that files can be saved to"""
     try:
-        from google.oauth2 import service_account
-        from googleapiclient.discovery import build
-        
-        # Get credentials from previously validated auth file
-
-        credentials = service_account.Credentials.from_service_account_file(
-            file_path, scopes=SCOPES)
-        
-        # Build Drive service
-        drive_service = build('drive', 'v3', credentials=credentials)
+        # Reuse the Drive client of the previously validated auth file
+        drive_service = get_session(file_path).drive_service
         
         # Query for folders
         results = drive_service.files().list(
@@ -92,24 +69,44 @@ def return_all_folders_with_id(file_path):
         return []
     
 
-def initialize_ee(file_path):
-    """Initialize Earth Engine with service account credentials"""
+# GEE names exported files <prefix>.tif, or <prefix>-<row>-<col>.tif when an export is split into tiles
+EXPORT_FILE_PATTERN = re.compile(r'^(?P<prefix>.+?)(-\d{10}-\d{10})?\.tif$')
+
+
+def return_folder_file_prefixes(file_path, folder_name):
+    """Return the set of exported GeoTIFF filename prefixes in the Drive folders with the given name"""
+    drive_service = get_session(file_path).drive_service
+
+    escaped_name = folder_name.replace("\\", "\\\\").replace("'", "\\'")
+    folders = drive_service.files().list(
+        q=f"mimeType='application/vnd.google-apps.folder' and name='{escaped_name}' and trashed=false",
+        fields="files(id)"
+    ).execute().get('files', [])
+
+    prefixes = set()
+    for folder in folders:
+        page_token = None
+        while True:
+            results = drive_service.files().list(
+                q=f"'{folder['id']}' in parents and trashed=false",
+                fields="nextPageToken, files(name)",
+                pageSize=1000,
+                pageToken=page_token
+            ).execute()
+            for drive_file in results.get('files', []):
+                match = EXPORT_FILE_PATTERN.match(drive_file['name'])
+                if match:
+                    prefixes.add(match.group('prefix'))
+            page_token = results.get('nextPageToken')
+            if not page_token:
+                break
+    return prefixes
+
+
+def initialize_ee(file_path, project=None):
+    """Initialize Earth Engine with service account credentials, in the project of the key file unless given"""
     try:
-        # Get the general credentials
-        credentials = get_credentials(file_path)
-        
-        # Create EE-specific credentials
-        ee_credentials = ee.ServiceAccountCredentials(
-            credentials.service_account_email,
-            file_path
-        )
-        
-        # Initialize EE with project ID
-        ee.Initialize(ee_credentials, project='stone-armor-430205-e2')
-        
-        # Test EE connection
-        ee.Number(1).getInfo()
-        print("Earth Engine initialized successfully")
+        get_session(file_path, project).initialize_ee()
         return True
         
     except Exception as e:
@@ -124,6 +121,7 @@ def check_assets_exist():
     json_file_path = "stone-armor-430205-e2-2cd696d4afcd.json"
     SHARED_ASSETS_ID = "projects/ee-qinheyi/assets/1823_ADRSM"
     """Check if an asset exists in the user's GEE account"""
+    import ee
     initialize_ee(json_file_path)
     shape_file_table=ee.FeatureCollection(SHARED_ASSETS_ID)
     
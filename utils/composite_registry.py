@@ -0,0 +1,215 @@
+"""
+Composite registry for GEE export tasks
+Memoizes the composite image of every (collection, date range, reducer) and optionally
+materializes composites reused by many exports as Earth Engine assets, so later exports
+read the precomputed image instead of reducing the raw collection again
+"""
+
+import json
+import re
+import threading
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+
+class CompositeRegistry:
+    """Composites keyed by (collection ID, start date, end date, reducer)"""
+
+    def __init__(self, backend, asset_root: Optional[str] = None, min_uses: int = 500, registry_file=None):
+        """
+        Initialize composite registry
+        Args:
+            backend: Earth Engine backend building the composites
+            asset_root: Asset folder the composites are materialized in, None to never materialize
+            min_uses: Minimum number of exports of a composite before it is materialized
+            registry_file: JSON file remembering the materialized composites between runs
+        """
+        self.backend = backend
+        self.asset_root = asset_root.rstrip('/') if asset_root else None
+        self.min_uses = min_uses
+        self.registry_file = Path(registry_file) if registry_file else None
+        self._composites: Dict[str, Any] = {}  # key -> backend image handle
+        self._assets: Dict[str, Dict[str, Any]] = {}  # key -> {'asset_id', 'task_id', 'state', 'region', 'scale'}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def composite_key(collection_id: str, start_date: str, end_date: str, reducer: str) -> str:
+        return f"{collection_id}|{start_date}|{end_date}|{reducer}"
+
+    def asset_id(self, collection_id: str, start_date: str, end_date: str, reducer: str,
+                 region: Dict[str, Any], scale: int) -> str:
+        """Asset ID of a materialized composite, e.g. <root>/S2_SR_HARMONIZED_median_20230101_20230110_<hash>"""
+        collection_name = re.sub(r'[^A-Za-z0-9_-]', '_', collection_id.rstrip('/').split('/')[-1])
+        # The region and scale are part of the ID, a wider region never overwrites an existing asset
+        extent = zlib.crc32(json.dumps([region, scale], sort_keys=True).encode())
+        return (f"{self.asset_root}/{collection_name}_{reducer}_"
+                f"{start_date.replace('-', '')}_{end_date.replace('-', '')}_{extent:08x}")
+
+    def load(self):
+        """Load the materialized composites of earlier runs"""
+        if self.registry_file is None or not self.registry_file.exists():
+            return
+        try:
+            with open(self.registry_file, 'r') as f:
+                self._assets = json.load(f).get('assets', {})
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Error loading composite registry: {str(e)}")
+            self._assets = {}
+
+    def save(self):
+        """Persist the materialized composites"""
+        if self.registry_file is None:
+            return
+        try:
+            self.registry_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.registry_file.with_suffix('.tmp')
+            with open(tmp_file, 'w') as f:
+                json.dump({'assets': self._assets}, f, indent=2)
+            tmp_file.replace(self.registry_file)
+        except OSError as e:
+            print(f"Error saving composite registry: {str(e)}")
+
+    def refresh(self, keys: Optional[Iterable[str]] = None):
+        """
+        Update the state of materialization tasks still running
+        Args:
+            keys: Composite keys to check, defaults to all of them
+        """
+        keys = self._assets.keys() if keys is None else keys
+        pending = {self._assets[key]['task_id']: key for key in keys
+                   if key in self._assets and self._assets[key]['state'] not in ('COMPLETED', 'FAILED', 'CANCELLED')}
+        if not pending:
+            return
+        try:
+            statuses = self.backend.get_task_status(list(pending))
+        except Exception as e:
+            print(f"Error checking composite materialization tasks: {str(e)}")
+            return
+        for status in statuses:
+            key = pending.get(status.get('id'))
+            if key is not None and status.get('state') not in (None, 'UNKNOWN'):
+                self._assets[key]['state'] = status['state']
+        self.save()
+
+    @staticmethod
+    def _covers(asset: Dict[str, Any], region: Optional[Dict[str, Any]], scale: Optional[int]) -> bool:
+        """
+        Whether an asset covers the region at the scale, an unknown scale is covered
+        An unknown region is not, e.g. while streaming, when only part of the regions is known
+        """
+        if scale is not None and asset.get('scale') is not None and asset['scale'] > scale:
+            return False
+        if region is None:
+            return False
+        if asset.get('region') is None:
+            return True
+        outer, inner = bounding_box([asset['region']]), bounding_box([region])
+        if inner is None:
+            return True
+        (o_min_x, o_min_y), (o_max_x, o_max_y) = outer['coordinates'][0][0], outer['coordinates'][0][2]
+        (i_min_x, i_min_y), (i_max_x, i_max_y) = inner['coordinates'][0][0], inner['coordinates'][0][2]
+        return o_min_x <= i_min_x and o_min_y <= i_min_y and i_max_x <= o_max_x and i_max_y <= o_max_y
+
+    def get(self, collection_id: str, start_date: str, end_date: str, reducer: str = 'median',
+            region: Optional[Dict[str, Any]] = None, scale: Optional[int] = None) -> Any:
+        """
+        Get the composite of a collection over a date range
+        Args:
+            region: GeoJSON region the composite is read in, a materialized asset is only used if it covers it,
+                never if the region is unknown
+            scale: Scale the composite is read at, a materialized asset is only used if it is as fine
+        Returns:
+            Backend handle of the materialized asset if it is ready, else of the composite expression
+        """
+        key = self.composite_key(collection_id, start_date, end_date, reducer)
+        with self._lock:
+            if key in self._composites:
+                return self._composites[key]
+
+            asset = self._assets.get(key)
+            if asset is not None:
+                self.refresh([key])
+            if asset is not None and asset['state'] == 'COMPLETED' and self._covers(asset, region, scale):
+                image = self.backend.get_image(asset['asset_id'])
+            else:
+                image = self.backend.get_composite(collection_id, start_date, end_date, reducer)
+
+            # Keep asking for the asset while it is being materialized
+            if asset is None or asset['state'] in ('COMPLETED', 'FAILED', 'CANCELLED'):
+                self._composites[key] = image
+            return image
+
+    def materialize(self, collection_id: str, start_date: str, end_date: str, reducer: str,
+                    region: Dict[str, Any], scale: int, uses: int) -> Optional[str]:
+        """
+        Start exporting a composite to an asset if it is reused enough and not materialized yet
+        Args:
+            collection_id: Image collection ID
+            start_date: Start date in YYYY-MM-DD format
+            end_date: End date in YYYY-MM-DD format
+            reducer: Reducer of the composite, e.g. median
+            region: GeoJSON region covering all exports of the composite
+            scale: Scale of the asset in meters
+            uses: Number of exports that will read the composite
+        Returns:
+            Task ID of the asset export, None if no export was started
+        """
+        if self.asset_root is None or uses < self.min_uses:
+            return None
+
+        key = self.composite_key(collection_id, start_date, end_date, reducer)
+        asset = self._assets.get(key)
+        if (asset is not None and asset['state'] not in ('FAILED', 'CANCELLED')
+                and (asset['state'] != 'COMPLETED' or self._covers(asset, region, scale))):
+            return None
+
+        asset_id = self.asset_id(collection_id, start_date, end_date, reducer, region, scale)
+        try:
+            image = self.backend.get_composite(collection_id, start_date, end_date, reducer)
+            task_id = self.backend.start_asset_export(
+                image=image,
+                asset_id=asset_id,
+                description=f"composite_{asset_id.split('/')[-1]}"[:100],
+                region=region,
+                scale=scale
+            )
+        except Exception as e:
+            print(f"Error materializing composite {asset_id}: {str(e)}")
+            return None
+
+        with self._lock:
+            self._assets[key] = {'asset_id': asset_id, 'task_id': task_id, 'state': 'READY',
+                                 'region': region, 'scale': scale}
+        self.save()
+        return task_id
+
+
+def _points(geometry: Dict[str, Any]):
+    """Yield the (x, y) points of a GeoJSON geometry of any type"""
+    if geometry.get('type') == 'GeometryCollection':
+        for part in geometry.get('geometries', []):
+            yield from _points(part)
+        return
+
+    stack = [geometry.get('coordinates', [])]
+    while stack:
+        coordinates = stack.pop()
+        if coordinates and isinstance(coordinates[0], (int, float)):
+            yield coordinates[0], coordinates[1]
+        else:
+            stack.extend(coordinates)
+
+
+def bounding_box(geometries: Iterable[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """GeoJSON polygon of the bounding box of the geometries, None if there are no points"""
+    min_x = min_y = float('inf')
+    max_x = max_y = float('-inf')
+    for geometry in geometries:
+        for x, y in _points(geometry):
+            min_x, max_x = min(min_x, x), max(max_x, x)
+            min_y, max_y = min(min_y, y), max(max_y, y)
+    if min_x == float('inf'):
+        return None
+    return {'type': 'Polygon',
+            'coordinates': [[[min_x, min_y], [max_x, min_y], [max_x, max_y], [min_x, max_y], [min_x, min_y]]]}
@@ -5,6 +5,9 @@ from pathlib import Path
 from dataclasses import dataclass, field
 from typing import Optional, Dict, Tuple
 
+# Default configuration next to the application, independent of the working directory
+TEMPLATE_CONFIG_FILE = Path(__file__).resolve().parent.parent / 'template_config.yaml'
+
 @dataclass
 class Config:
     """Global configuration for GEE Export application"""
@@ -36,7 +39,7 @@ class Config:
                     yaml_config = yaml.safe_load(f)
             else:
                 # Fallback to default template if no file provided
-                with open('template_config.yaml', 'r') as f:
+                with open(TEMPLATE_CONFIG_FILE, 'r') as f:
                     yaml_config = yaml.safe_load(f)
             
             instance = cls()
@@ -101,10 +104,25 @@ class Config:
         return self.yaml_config.get('export_settings', {})   
     
     def get_output_settings(self):
-        return self.config.get('output_settings', {})
+        return self.yaml_config.get('output_settings', {})
     
     def get_input_files(self):
         return self.yaml_config.get('input_files', {})       
 
-    
-config = Config.load_from_yaml()
+
+_default_config = None
+
+
+def get_default_config() -> Config:
+    """Config loaded from template_config.yaml on first use, not at import time"""
+    global _default_config
+    if _default_config is None:
+        _default_config = Config.load_from_yaml()
+    return _default_config
+
+
+def __getattr__(name):
+    # Keeps `from utils.config import config` working without loading the template on import
+    if name == 'config':
+        return get_default_config()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
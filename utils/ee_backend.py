@@ -0,0 +1,192 @@
+"""
+Earth Engine backend interface
+All Earth Engine calls of the export pipeline go through a backend, so the
+pipeline can run against the real ee module or an offline simulation
+"""
+
+from abc import ABC, abstractmethod
+from contextlib import nullcontext
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.profiler import profile_phase
+
+
+class EarthEngineBackend(ABC):
+    """Interface of the Earth Engine operations used by the export pipeline"""
+
+    name = 'base'
+    profiler = None  # optional PhaseProfiler timing export construction and task start
+
+    @abstractmethod
+    def initialize(self, auth_file):
+        """Authenticate, raising on failure"""
+
+    @abstractmethod
+    def get_asset_version(self, asset_id: str) -> Optional[str]:
+        """Return a value that changes whenever the asset changes, None if unknown"""
+
+    @abstractmethod
+    def get_collection_size(self, asset_id: str) -> int:
+        """Return the number of features of a FeatureCollection asset"""
+
+    @abstractmethod
+    def get_property_values(self, asset_id: str, property_name: str) -> Tuple[List[str], List[Any]]:
+        """Return (property names of the first feature, values of property_name of all features)"""
+
+    @abstractmethod
+    def compute_regions(self, asset_id: str, indices: List[int],
+                        region_calculator) -> Dict[int, Tuple[Dict[str, Any], float]]:
+        """Return index -> (export region GeoJSON, shape_size_ha) following the calculator's rules"""
+
+    @abstractmethod
+    def get_composite(self, collection_id: str, start_date: str, end_date: str, reducer: str = 'median') -> Any:
+        """Return a handle of the reduced image of a collection over a date range"""
+
+    @abstractmethod
+    def get_image(self, asset_id: str) -> Any:
+        """Return a handle of an image asset"""
+
+    @abstractmethod
+    def start_export(self, image: Any, region: Dict[str, Any], description: str, folder: str,
+                     file_name_prefix: str, scale: int, crs: str = 'EPSG:4326',
+                     max_pixels: float = 1e13) -> str:
+        """Start a Drive export of the image clipped to the region, returning the task ID"""
+
+    @abstractmethod
+    def start_asset_export(self, image: Any, asset_id: str, description: str, region: Dict[str, Any],
+                           scale: int, crs: str = 'EPSG:4326', max_pixels: float = 1e13) -> str:
+        """Start an export of the image to an Earth Engine asset, returning the task ID"""
+
+    @abstractmethod
+    def list_tasks(self) -> List[Dict[str, Any]]:
+        """Return {'id', 'state'} of all tasks of the account"""
+
+    @abstractmethod
+    def get_task_status(self, task_ids: List[str]) -> List[Dict[str, Any]]:
+        """Return the status of the given tasks, in the getTaskStatus format"""
+
+
+class EEBackend(EarthEngineBackend):
+    """Backend calling the real Earth Engine API"""
+
+    name = 'ee'
+
+    def __init__(self, project: Optional[str] = None):
+        """
+        Initialize Earth Engine backend
+        Args:
+            project: Google Cloud project of the requests, defaults to the project of the auth file
+        """
+        self.project = project
+        self.session = None
+
+    def _account(self):
+        """Hold Earth Engine on this backend's account while a request runs, see utils.session.ee_account"""
+        if self.session is None:
+            return nullcontext()
+        from utils.session import ee_account
+        return ee_account(self.session)
+
+    def initialize(self, auth_file):
+        from utils.session import get_session
+        self.session = get_session(auth_file, self.project)
+        with self._account():
+            self.session.initialize_ee()
+
+    def get_asset_version(self, asset_id):
+        import ee
+        try:
+            with self._account():
+                return ee.data.getAsset(asset_id).get('updateTime')
+        except Exception as e:
+            print(f"Error reading asset version: {str(e)}")
+            return None
+
+    def get_collection_size(self, asset_id):
+        import ee
+        with self._account():
+            return ee.FeatureCollection(asset_id).size().getInfo()
+
+    def get_property_values(self, asset_id, property_name):
+        import ee
+        feature_collection = ee.FeatureCollection(asset_id)
+        with self._account():
+            info = ee.Dictionary({
+                'properties': feature_collection.first().propertyNames(),
+                'values': feature_collection.aggregate_array(property_name)
+            }).getInfo()
+        return info['properties'], info['values']
+
+    def compute_regions(self, asset_id, indices, region_calculator):
+        import ee
+        with self._account():
+            return region_calculator.compute_regions(ee.FeatureCollection(asset_id), indices)
+
+    def get_composite(self, collection_id, start_date, end_date, reducer='median'):
+        import ee
+        collection = ee.ImageCollection(collection_id).filterDate(start_date, end_date)
+        return getattr(collection, reducer)()
+
+    def get_image(self, asset_id):
+        import ee
+        return ee.Image(asset_id)
+
+    def start_export(self, image, region, description, folder, file_name_prefix, scale,
+                     crs='EPSG:4326', max_pixels=1e13):
+        import ee
+        with profile_phase(self.profiler, 'export_construction'):
+            export_region = ee.Geometry(region)
+            task = ee.batch.Export.image.toDrive(
+                image=image.clip(export_region),
+                description=description,
+                folder=folder,
+                scale=scale,
+                region=export_region,
+                crs=crs,
+                maxPixels=max_pixels,
+                fileNamePrefix=file_name_prefix
+            )
+        with profile_phase(self.profiler, 'task_start'), self._account():
+            task.start()
+        return task.id
+
+    def start_asset_export(self, image, asset_id, description, region, scale, crs='EPSG:4326', max_pixels=1e13):
+        import ee
+        task = ee.batch.Export.image.toAsset(
+            image=image,
+            description=description,
+            assetId=asset_id,
+            region=ee.Geometry(region),
+            scale=scale,
+            crs=crs,
+            maxPixels=max_pixels
+        )
+        with self._account():
+            task.start()
+        return task.id
+
+    def list_tasks(self):
+        import ee
+        with self._account():
+            return [{'id': task.id, 'state': task.state} for task in ee.batch.Task.list()]
+
+    def get_task_status(self, task_ids):
+        import ee
+        with self._account():
+            return ee.data.getTaskStatus(task_ids)
+
+
+def get_backend(name: str = 'ee', project: Optional[str] = None, **options) -> EarthEngineBackend:
+    """
+    Create a backend by name
+    Args:
+        name: 'ee' for the Earth Engine API, 'simulated' for the offline simulation
+        project: Google Cloud project of the Earth Engine requests, ignored by the simulation
+        options: Options passed to the backend constructor
+    """
+    if name == 'ee':
+        return EEBackend(project=project, **options)
+    if name == 'simulated':
+        from utils.simulated_backend import SimulatedBackend
+        return SimulatedBackend(**options)
+    raise ValueError(f"Unknown backend '{name}', expected 'ee' or 'simulated'")
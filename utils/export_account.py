@@ -0,0 +1,76 @@
+"""
+Export accounts
+The task limit of Earth Engine is per account, so a run can spread its tasks over several
+service accounts, each with its own credential, project, task slots and scheduler
+"""
+
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional
+
+from utils.ee_backend import EarthEngineBackend
+from utils.export_pipeline import ExportPipeline
+from utils.task_scheduler import TaskScheduler
+from utils.task_submitter import TaskSubmitter
+from utils.task_tracker import TaskTracker
+
+
+@dataclass
+class Credential:
+    """Service account key file and the Google Cloud project its Earth Engine requests are made in"""
+    auth_file: str
+    project: Optional[str] = None  # defaults to the project_id of the key file
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Credential':
+        return cls(str(data['auth_file']), data.get('project'))
+
+
+def build_credentials(auth_files: List[str], projects: Optional[List[str]] = None) -> List[Credential]:
+    """
+    Pair key files with projects
+    Args:
+        auth_files: Service account key files
+        projects: None to use the project of every key file, one project for all key files,
+            or one project per key file in the same order
+    Returns:
+        List of Credential
+    """
+    projects = projects or [None]
+    if len(projects) == 1:
+        projects = projects * len(auth_files)
+    if len(projects) != len(auth_files):
+        raise ValueError(f"Expected one project or one project per auth file, got {len(projects)} projects "
+                         f"for {len(auth_files)} auth files")
+    return [Credential(str(auth_file), project) for auth_file, project in zip(auth_files, projects)]
+
+
+class ExportAccount:
+    """Task slots of one credential: its backend, task tracker, submitter, scheduler and streaming pipeline"""
+
+    def __init__(self, number: int, credential: Credential, backend: EarthEngineBackend, tracker: TaskTracker,
+                 submitter: TaskSubmitter, scheduler: TaskScheduler, pipeline: ExportPipeline):
+        """
+        Initialize export account
+        Args:
+            number: Position of the account in the run, its shard of the task plan
+            credential: Credential of the account
+            backend: Earth Engine backend authenticated with the credential
+            tracker: Tracker of the tasks submitted with this account
+            submitter: Submission thread pool of the account
+            scheduler: Scheduler keeping the task slots of the account full
+            pipeline: Streaming pipeline feeding the scheduler
+        """
+        self.number = number
+        self.credential = credential
+        self.backend = backend
+        self.task_tracker = tracker
+        self.submitter = submitter
+        self.scheduler = scheduler
+        self.pipeline = pipeline
+
+    @property
+    def name(self) -> str:
+        return f"account {self.number} ({self.credential.project or self.credential.auth_file})"
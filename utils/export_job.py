@@ -0,0 +1,70 @@
+"""
+Export job specification
+An export run covers one or more image sources for the same target indices,
+each source with its own date cadence, export scale and Drive folder
+"""
+
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional
+
+
+# Date cadences
+MONTHLY = 'monthly'  # one composite per month
+DEKADAL = 'dekadal'  # three composites per month: days 1-10, 11-20 and 21-end
+CADENCES = (MONTHLY, DEKADAL)
+
+
+def default_cadence(source_type: str) -> str:
+    """Monthly for NICFI basemaps, three periods per month for other sources"""
+    return MONTHLY if source_type.lower() == 'nicfi' else DEKADAL
+
+
+@dataclass
+class SourceJob:
+    """Export of one image source to one Drive folder"""
+    source_type: str
+    folder_name: Optional[str] = None
+    cadence: Optional[str] = None  # defaults to image_sources.<source>.cadence, then default_cadence
+    scale: Optional[int] = None  # defaults to image_sources.<source>.scale_meters
+
+    def resolve(self, config) -> 'SourceJob':
+        """
+        Fill the unset cadence and scale from the config
+        Args:
+            config: Configuration object containing the image sources
+        Returns:
+            SourceJob: New job with cadence and scale set
+        """
+        source_config = config.get_image_sources().get(self.source_type, {})
+        cadence = self.cadence or source_config.get('cadence') or default_cadence(self.source_type)
+        if cadence not in CADENCES:
+            raise ValueError(f"Unknown cadence '{cadence}' for source '{self.source_type}', expected one of {list(CADENCES)}")
+        if self.source_type.lower() == 'nicfi' and cadence != MONTHLY:
+            # NICFI file prefixes carry only the month, periods within a month would share a file name
+            raise ValueError(f"NICFI basemaps are monthly, cadence '{cadence}' is not supported")
+        scale = self.scale or source_config.get('scale_meters') or (5 if self.source_type.lower() == 'nicfi' else 10)
+        return SourceJob(self.source_type, self.folder_name, cadence, int(scale))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'SourceJob':
+        return cls(**{key: data.get(key) for key in ('source_type', 'folder_name', 'cadence', 'scale')})
+
+
+def build_jobs(source_types: List[str], folder_names: List[str]) -> List[SourceJob]:
+    """
+    Pair sources with folders
+    Args:
+        source_types: Image source types
+        folder_names: One folder shared by all sources, or one folder per source in the same order
+    Returns:
+        List of SourceJob
+    """
+    if len(folder_names) == 1:
+        folder_names = folder_names * len(source_types)
+    if len(folder_names) != len(source_types):
+        raise ValueError(f"Expected one folder or one folder per source, got {len(folder_names)} folders "
+                         f"for {len(source_types)} sources")
+    return [SourceJob(source_type, folder_name) for source_type, folder_name in zip(source_types, folder_names)]
@@ -0,0 +1,139 @@
+"""
+Streaming export pipeline for GEE export tasks
+Runs plan -> resolve region -> build export as generator stages on worker threads,
+connected by bounded queues, so the scheduler submits the first task as soon as it is
+built and memory stays constant however many tasks the run has
+"""
+
+import queue
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+
+_DONE = object()
+
+
+class _StageError:
+    """Exception raised by a stage, handed downstream in place of an item"""
+
+    def __init__(self, stage: str, error: Exception):
+        self.stage = stage
+        self.error = error
+
+
+class Stage:
+    """Iterate an iterable on a worker thread, handing its items on through a bounded queue"""
+
+    def __init__(self, name: str, items: Iterable, maxsize: int, stop: threading.Event):
+        """
+        Initialize and start a stage
+        Args:
+            name: Stage name, used for the thread name and in errors
+            items: Iterable producing the items of the stage, consumed on the worker thread
+            maxsize: Number of items buffered before the worker blocks
+            stop: Event stopping the worker when set
+        """
+        self.name = name
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.count = 0
+        self._stop = stop
+        self._thread = threading.Thread(target=self._run, args=(items,), name=f"pipeline-{name}", daemon=True)
+        self._thread.start()
+
+    def _put(self, item) -> bool:
+        """Block until the item is queued, returns False if the pipeline was stopped"""
+        while not self._stop.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self, items: Iterable):
+        try:
+            for item in items:
+                if not self._put(item):
+                    return
+        except Exception as e:
+            self._put(_StageError(self.name, e))
+            return
+        self._put(_DONE)
+
+    def empty(self) -> bool:
+        """Whether no item is waiting, i.e. the stage is behind its consumer"""
+        return self.queue.empty()
+
+    def join(self, timeout: Optional[float] = None):
+        self._thread.join(timeout)
+
+    def __iter__(self) -> Iterator[Any]:
+        while True:
+            item = self.queue.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _StageError):
+                raise RuntimeError(f"Export pipeline stage '{item.stage}' failed: {str(item.error)}") from item.error
+            self.count += 1
+            yield item
+
+
+class ExportPipeline:
+    """Plan, region and build stages feeding the task scheduler"""
+
+    def __init__(self, queue_size: int = 1000, region_batch_size: int = 500):
+        """
+        Initialize export pipeline
+        Args:
+            queue_size: Items buffered between two stages
+            region_batch_size: Most tasks whose regions are resolved with one backend call
+        """
+        self.queue_size = queue_size
+        self.region_batch_size = region_batch_size
+        self.stages: List[Stage] = []
+        self._stop = threading.Event()
+
+    def run(self, tasks: Iterable, resolve_regions: Callable[[List[Any]], None],
+            build: Callable[[Any], Any], region_key: Optional[Callable[[Any], Any]] = None) -> Iterator[Any]:
+        """
+        Start the stages
+        Args:
+            tasks: Planned tasks, consumed lazily on the plan thread
+            resolve_regions: Callable making sure the export regions of a batch of tasks are cached
+            build: Callable turning a task with a resolved region into a job for the scheduler
+            region_key: Callable giving the region of a task, batches then hold region_batch_size
+                distinct regions instead of region_batch_size tasks
+        Returns:
+            Iterator of built jobs, blocking until the next job is built
+        """
+        self._stop.clear()
+        planned = Stage('plan', tasks, self.queue_size, self._stop)
+        resolved = Stage('region', self._resolve_batches(planned, resolve_regions, region_key), self.queue_size, self._stop)
+        built = Stage('build', map(build, resolved), self.queue_size, self._stop)
+        self.stages = [planned, resolved, built]
+        return iter(built)
+
+    def _resolve_batches(self, tasks: Stage, resolve_regions: Callable[[List[Any]], None],
+                         region_key: Optional[Callable[[Any], Any]] = None) -> Iterator[Any]:
+        batch, regions = [], set()
+        for task in tasks:
+            batch.append(task)
+            regions.add(region_key(task) if region_key is not None else len(batch))
+            # Resolve a full batch, or what has been planned so far when planning is the slower stage
+            if len(regions) >= self.region_batch_size or tasks.empty():
+                resolve_regions(batch)
+                yield from batch
+                batch, regions = [], set()
+        if batch:
+            resolve_regions(batch)
+            yield from batch
+
+    def stop(self, timeout: float = 5):
+        """Stop the stages, waiting up to timeout seconds for each worker"""
+        self._stop.set()
+        for stage in self.stages:
+            stage.join(timeout)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Items handed on and items queued per stage"""
+        return {stage.name: {'count': stage.count, 'queued': stage.queue.qsize()} for stage in self.stages}
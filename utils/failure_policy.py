@@ -0,0 +1,89 @@
+"""
+Failure classification and retry policy for GEE export tasks
+Sorts submission errors and server-side task failures into quota, transient,
+bad geometry and permanent classes, and decides how often and how late to retry them
+"""
+
+import re
+from typing import Dict, Optional, Union
+
+
+# Failure classes
+QUOTA = 'quota'                # rate limit or task queue full, retry after backing off
+TRANSIENT = 'transient'        # backend hiccup, retry after backing off
+BAD_GEOMETRY = 'bad_geometry'  # region rejected, export regions are already bounding boxes so not retried
+PERMANENT = 'permanent'        # retrying cannot help, goes to the dead-letter list
+
+# Checked first, messages that mention retrying or geometry but cannot succeed on a retry
+PERMANENT_ERROR_MARKERS = ('not found in shared asset', 'too large', 'memory limit', 'permission denied')
+QUOTA_ERROR_MARKERS = ('quota', 'rate limit', 'too many', 'resource exhausted')
+BAD_GEOMETRY_MARKERS = ('geometry', 'geojson', 'polygon', 'linearring', 'self-intersect', 'coordinates',
+                        'invalid region', 'empty region')
+TRANSIENT_ERROR_MARKERS = ('timeout', 'timed out', 'deadline exceeded', 'internal error', 'backend error',
+                           'unavailable', 'connection', 'temporarily', 'try again', 'retry',
+                           'unknown to the backend')
+
+# HTTP status codes, matched as whole numbers so indices and pixel counts containing them do not match
+QUOTA_STATUS_CODES = (429,)
+TRANSIENT_STATUS_CODES = (500, 502, 503, 504)
+STATUS_CODE_PATTERN = re.compile(r'(?<![\w.])(429|50[0234])(?!\w|\.\d)')
+
+
+def _status_code(error: Union[Exception, str, None]) -> Optional[int]:
+    """HTTP status of an API error, from the response if the exception carries one, else from the message"""
+    status = getattr(getattr(error, 'resp', None), 'status', None)
+    if status is not None:
+        try:
+            return int(status)
+        except (TypeError, ValueError):
+            pass
+    match = STATUS_CODE_PATTERN.search(str(error or ''))
+    return int(match.group(1)) if match else None
+
+
+def classify_failure(error: Union[Exception, str, None]) -> str:
+    """
+    Classify a submission error or the error message of a failed task
+    Args:
+        error: Exception raised when submitting, or error_message of a FAILED task
+    Returns:
+        str: One of QUOTA, TRANSIENT, BAD_GEOMETRY, PERMANENT
+    """
+    message = str(error or '').lower()
+    if any(marker in message for marker in PERMANENT_ERROR_MARKERS):
+        return PERMANENT
+    status = _status_code(error)
+    if status in QUOTA_STATUS_CODES or any(marker in message for marker in QUOTA_ERROR_MARKERS):
+        return QUOTA
+    if any(marker in message for marker in BAD_GEOMETRY_MARKERS):
+        return BAD_GEOMETRY
+    if status in TRANSIENT_STATUS_CODES or any(marker in message for marker in TRANSIENT_ERROR_MARKERS):
+        return TRANSIENT
+    return PERMANENT
+
+
+class RetryPolicy:
+    """Bounded exponential backoff per failure class"""
+
+    def __init__(self, max_retries: int = 3, base_delay: float = 30, max_delay: float = 900,
+                 class_retries: Optional[Dict[str, int]] = None):
+        """
+        Initialize retry policy
+        Args:
+            max_retries: Retries of quota and transient failures
+            base_delay: Delay before the first retry in seconds, doubled after every retry
+            max_delay: Longest delay between retries in seconds
+            class_retries: Retries per failure class, overriding max_retries
+        """
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.class_retries = {QUOTA: max_retries, TRANSIENT: max_retries, BAD_GEOMETRY: 0, PERMANENT: 0}
+        self.class_retries.update(class_retries or {})
+
+    def should_retry(self, failure_class: str, attempt: int) -> bool:
+        """Whether a job that already failed attempt + 1 times with this class is retried"""
+        return attempt < self.class_retries.get(failure_class, 0)
+
+    def delay(self, attempt: int) -> float:
+        """Seconds to wait before retry number attempt + 1"""
+        return min(self.max_delay, self.base_delay * 2 ** attempt)
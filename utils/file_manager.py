@@ -1,6 +1,5 @@
 from pathlib import Path
 from typing import Dict, List, Optional
-import pandas as pd
 import yaml
 import json
 from dataclasses import dataclass
@@ -43,6 +42,7 @@ class FileManager:
     def load_shapefile_data(self, shapefile_path: str) -> bool:
         """Load shapefile attributes CSV"""
         try:
+            import pandas as pd
             self.shapefile_data = pd.read_csv(shapefile_path)
             return True
         except Exception as e:
@@ -72,6 +72,8 @@ class FileManager:
     def get_target_indices(self) -> List[int]:
         """Get list of target indices from target list"""
         if self.input_files.target_file is not None:
+            # pandas is imported here, on first use, to keep startup fast
+            import pandas as pd
             # Read the CSV file from the Path object
             target_csv_df = pd.read_csv(self.input_files.target_file)
             # Assuming the first column contains the indices
@@ -80,6 +82,25 @@ class FileManager:
             return target_csv_df[target_field].tolist()
         return []
 
+    def get_target_priorities(self, column: str) -> Dict[int, float]:
+        """
+        Get the priority of every target index from a column of the target list
+        Args:
+            column: Name of the priority column, lower values are exported first
+        Returns:
+            Dict of index -> priority, indices with an empty priority are left out
+        """
+        if self.input_files.target_file is None:
+            return {}
+        import pandas as pd
+        target_csv_df = pd.read_csv(self.input_files.target_file)
+        if column not in target_csv_df.columns:
+            raise ValueError(f"Priority column '{column}' not found in {self.input_files.target_file.name}, "
+                             f"columns are {list(target_csv_df.columns)}")
+        target_field = target_csv_df.columns[0]
+        priorities = target_csv_df[[target_field, column]].dropna()
+        return dict(zip(priorities[target_field].tolist(), priorities[column].astype(float).tolist()))
+
     def get_shape_attributes(self, index: int) -> Dict:
         """Get shapefile attributes for a specific index"""
         if self.shapefile_data is not None:
@@ -1,30 +1,18 @@
-import ee
+from dataclasses import dataclass, field
+from typing import List
 from utils.auth_validator import get_credentials
-import pandas as pd
+from utils.session import get_session
+from utils.ee_backend import EEBackend
 
 
 def return_credentials(file_path):
     return get_credentials(file_path)
 
 
-def initialize_ee(file_path):
-    """Initialize Earth Engine with service account credentials"""
+def initialize_ee(file_path, project=None):
+    """Initialize Earth Engine with service account credentials, once per auth file and project"""
     try:
-        # Get the general credentials
-        credentials = get_credentials(file_path)
-        
-        # Create EE-specific credentials
-        ee_credentials = ee.ServiceAccountCredentials(
-            credentials.service_account_email,
-            file_path
-        )
-        
-        # Initialize EE with project ID
-        ee.Initialize(ee_credentials, project='stone-armor-430205-e2')
-        
-        # Test EE connection
-        ee.Number(1).getInfo()
-        print("Earth Engine initialized successfully")
+        get_session(file_path, project).initialize_ee()
         return True
         
     except Exception as e:
@@ -32,54 +20,64 @@ def initialize_ee(file_path):
         return False
 
 
-def return_assets_size(file_path, asset_id):
-    initialize_ee(file_path)
-    shape_file_table=ee.FeatureCollection(asset_id)
-    return shape_file_table.size().getInfo()
+def return_assets_size(file_path, asset_id, backend=None):
+    backend = backend or EEBackend()
+    backend.initialize(file_path)
+    return backend.get_collection_size(asset_id)
+
+
+@dataclass
+class TargetComparison:
+    """Result of matching the target list against the shared asset"""
+    target_field: str
+    field_exists: bool = True
+    matched_indices: List = field(default_factory=list)
+    unmatched_indices: List = field(default_factory=list)
 
+    @property
+    def total_target_count(self) -> int:
+        return len(self.matched_indices) + len(self.unmatched_indices)
 
-def compare_target_asset(credentials_file_path, target_csv, shared_asset_id):
+    @property
+    def matched_count(self) -> int:
+        return len(self.matched_indices)
+
+    def summary(self) -> str:
+        """Human readable comparison result"""
+        if not self.field_exists:
+            return "The field does not exist in the shared asset's shapefile table"
+        result_str = f"Total target values: {self.total_target_count}\n"
+        result_str += f"Number of target values found in shared asset: {self.matched_count}\n"
+        result_str += f"Number of target values not found: {len(self.unmatched_indices)}"
+        return result_str
+
+
+def compare_target_asset(credentials_file_path, target_csv, shared_asset_id, backend=None) -> TargetComparison:
     # the csv file contains the list of the a field which also in the shared asset's shapefile table.
     # 1step. does this field exist in the shared asset's shapefile table?
-    # 2step. if it does, how many features are there in the shared asset's shapefile table?
-    # 3step. compare the number of features between the target asset and the shared asset
-    result_str=""
-    # 1step
-    initialize_ee(credentials_file_path)
-    shared_asset_table=ee.FeatureCollection(shared_asset_id)
-    shared_asset_table_size=shared_asset_table.size().getInfo()
+    # 2step. if it does, fetch only that field's values, without geometries, in one request
+    # 3step. match the target values against the set of asset values
+    backend = backend or EEBackend()
+    backend.initialize(credentials_file_path)
     # get the target_csv's field's name
-    target_csv_df=pd.read_csv(target_csv)
-    target_field=target_csv_df.columns[0]
-    # check if this field exists in the shared asset's shapefile table
-    if target_field in shared_asset_table.getInfo()['features'][0]['properties']:
-        # 2step
-        shared_asset_field_size=shared_asset_table.getInfo()['features'][0]['properties'][target_field]
-    else:
-        result_str="The field does not exist in the shared asset's shapefile table"
-        return result_str
-    
-    # compare all the target's rows value with the shared asset's shapefile table's field value 
+    import pandas as pd
     target_csv_df = pd.read_csv(target_csv)
-    total_target_count = len(target_csv_df)
-    matched_count = 0
-    
-    # Get all features from shared asset table
-    features = shared_asset_table.getInfo()['features']
-    
-    # Check each target value against all features
-    for index, row in target_csv_df.iterrows():
-        target_value = row[0]
-        for feature in features:
-            if str(target_value) == str(feature['properties'][target_field]):
-                matched_count += 1
-                break
-    
-    result_str = f"Total target values: {total_target_count}\n"
-    result_str += f"Number of target values found in shared asset: {matched_count}\n"
-    result_str += f"Number of target values not found: {total_target_count - matched_count}"
-    
-    return result_str
+    target_field = target_csv_df.columns[0]
+
+    # 1step and 2step
+    property_names, values = backend.get_property_values(shared_asset_id, target_field)
+    if target_field not in property_names:
+        return TargetComparison(target_field, field_exists=False)
+
+    # 3step
+    asset_values = {str(value) for value in values}
+    comparison = TargetComparison(target_field)
+    for target_value in target_csv_df[target_field].tolist():
+        if str(target_value) in asset_values:
+            comparison.matched_indices.append(target_value)
+        else:
+            comparison.unmatched_indices.append(target_value)
+    return comparison
 
 
 
@@ -0,0 +1,95 @@
+"""
+Log sink for the export log widget
+Messages from any thread are queued and written to the Tk Text widget in
+batches on a timer, keeping only the last max_lines lines
+"""
+
+import logging
+import queue
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+import tkinter as tk
+
+
+class QueueLogSink:
+    """Thread-safe, bounded, batched log writer for a Tk Text widget"""
+
+    def __init__(self, root, text_widget: tk.Text, max_lines: int = 5000, batch_size: int = 500,
+                 interval_ms: int = 200):
+        """
+        Initialize log sink
+        Args:
+            root: Tk root window used to schedule flushes
+            text_widget: Read-only Text widget showing the log
+            max_lines: Number of lines kept in the widget
+            batch_size: Maximum number of messages written per flush
+            interval_ms: Interval between flushes
+        """
+        self.root = root
+        self.text_widget = text_widget
+        self.max_lines = max_lines
+        self.batch_size = batch_size
+        self.interval_ms = interval_ms
+        self._queue = queue.Queue()
+        self._file_logger = None
+        self.root.after(self.interval_ms, self._flush)
+
+    def write(self, message: str):
+        """Queue a message, safe to call from any thread"""
+        line = f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - {message}"
+        self._queue.put(line)
+        if self._file_logger is not None:
+            self._file_logger.info(line)
+
+    def set_log_file(self, log_file, max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5):
+        """
+        Also write messages to a rotating log file
+        Args:
+            log_file: Path of the log file, None to stop writing to a file
+            max_bytes: Size at which the log file is rotated
+            backup_count: Number of rotated files kept
+        """
+        if self._file_logger is not None:
+            for handler in list(self._file_logger.handlers):
+                self._file_logger.removeHandler(handler)
+                handler.close()
+            self._file_logger = None
+        if log_file is None:
+            return
+
+        Path(log_file).parent.mkdir(parents=True, exist_ok=True)
+        handler = RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger = logging.getLogger(f"{__name__}.{id(self)}")
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        logger.addHandler(handler)
+        self._file_logger = logger
+
+    def _flush(self):
+        """Write queued messages to the widget on the Tk thread"""
+        lines = []
+        while len(lines) < self.batch_size:
+            try:
+                lines.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+        if lines:
+            # Only the last max_lines lines can remain visible
+            lines = lines[-self.max_lines:]
+            self.text_widget.config(state='normal')
+            self.text_widget.insert(tk.END, '\n'.join(lines) + '\n')
+            line_count = int(self.text_widget.index('end-1c').split('.')[0]) - 1
+            if line_count > self.max_lines:
+                self.text_widget.delete('1.0', f'{line_count - self.max_lines + 1}.0')
+            self.text_widget.see(tk.END)  # Scroll to bottom
+            self.text_widget.config(state='disabled')
+
+        # Flush again right away if messages are piling up
+        self.root.after(1 if not self._queue.empty() else self.interval_ms, self._flush)
+
+    def close(self):
+        self.set_log_file(None)
@@ -0,0 +1,230 @@
+"""
+Export metrics for GEE export tasks
+Counters, histograms and gauges of an export run, exposed in the Prometheus text
+format on an optional local HTTP endpoint and written as a JSON summary at run end
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+
+METRIC_PREFIX = 'gee_export_'
+
+# Bucket upper bounds in seconds, from a fast RPC to a task running for hours
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+DURATION_BUCKETS = (10, 30, 60, 120, 300, 600, 1200, 1800, 3600, 7200, 14400)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Cumulative bucket counts with sum, count and max"""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.bucket_counts[i] += 1
+                break
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate of the q quantile, interpolated within its bucket like Prometheus histogram_quantile"""
+        if not self.count:
+            return None
+        rank, seen, lower = q * self.count, 0, 0.0
+        for bound, bucket_count in zip(self.buckets, self.bucket_counts):
+            if bucket_count and seen + bucket_count >= rank:
+                upper = min(bound, self.max)
+                return round(lower + (upper - lower) * (rank - seen) / bucket_count, 3)
+            seen += bucket_count
+            lower = bound
+        return round(self.max, 3)
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 3),
+            'mean': round(self.sum / self.count, 3) if self.count else None,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'max': round(self.max, 3) if self.count else None
+        }
+
+
+class ExportMetrics:
+    """Thread-safe registry of the metrics of an export run"""
+
+    HISTOGRAM_BUCKETS = {
+        'submit_latency_seconds': LATENCY_BUCKETS,
+        'queue_wait_seconds': DURATION_BUCKETS,
+        'run_seconds': DURATION_BUCKETS
+    }
+
+    HELP = {
+        'tasks_submitted_total': "Export tasks started on Earth Engine",
+        'tasks_completed_total': "Export tasks that finished COMPLETED",
+        'tasks_failed_total': "Export tasks that finished FAILED or CANCELLED",
+        'submit_errors_total': "Failed export submission attempts, including retried ones",
+        'tasks_retried_total': "Failed submissions and FAILED tasks queued for a retry, by failure class",
+        'dead_letters_total': "Tasks given up on after a permanent failure or exhausted retries, by failure class",
+        'submit_latency_seconds': "Wall time of one export submission call",
+        'queue_wait_seconds': "Time from task creation to task start, from GEE task timestamps",
+        'run_seconds': "Time from task start to task end, from GEE task timestamps",
+        'tasks_in_flight': "Tasks of this run holding a task slot"
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[str, Dict[Labels, float]] = {}
+        self.histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self.gauges: Dict[str, Callable[[], float]] = {}
+
+    @staticmethod
+    def _labels(labels: Dict[str, str]) -> Labels:
+        return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """Increase a counter"""
+        key = self._labels(labels)
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        """Add a value to a histogram"""
+        key = self._labels(labels)
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = Histogram(self.HISTOGRAM_BUCKETS.get(name, DURATION_BUCKETS))
+            series[key].observe(value)
+
+    def set_gauge(self, name: str, read: Callable[[], float]):
+        """Register a gauge read when the metrics are collected"""
+        self.gauges[name] = read
+
+    def counter_total(self, name: str) -> float:
+        return sum(self.counters.get(name, {}).values())
+
+    @staticmethod
+    def _format_labels(labels: Labels, extra: Labels = ()) -> str:
+        labels = labels + extra
+        if not labels:
+            return ''
+        return '{' + ','.join(f'{key}="{value}"' for key, value in labels) + '}'
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self.counters.items()):
+                metric = METRIC_PREFIX + name
+                lines.append(f"# HELP {metric} {self.HELP.get(name, name)}")
+                lines.append(f"# TYPE {metric} counter")
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{metric}{self._format_labels(labels)} {value:g}")
+
+            for name, series in sorted(self.histograms.items()):
+                metric = METRIC_PREFIX + name
+                lines.append(f"# HELP {metric} {self.HELP.get(name, name)}")
+                lines.append(f"# TYPE {metric} histogram")
+                for labels, histogram in sorted(series.items()):
+                    cumulative = 0
+                    for bound, bucket_count in zip(histogram.buckets, histogram.bucket_counts):
+                        cumulative += bucket_count
+                        lines.append(f"{metric}_bucket{self._format_labels(labels, (('le', f'{bound:g}'),))} {cumulative}")
+                    lines.append(f"{metric}_bucket{self._format_labels(labels, (('le', '+Inf'),))} {histogram.count}")
+                    lines.append(f"{metric}_sum{self._format_labels(labels)} {histogram.sum:g}")
+                    lines.append(f"{metric}_count{self._format_labels(labels)} {histogram.count}")
+
+        for name, read in sorted(self.gauges.items()):
+            metric = METRIC_PREFIX + name
+            lines.append(f"# HELP {metric} {self.HELP.get(name, name)}")
+            lines.append(f"# TYPE {metric} gauge")
+            try:
+                lines.append(f"{metric} {read():g}")
+            except Exception as e:
+                print(f"Error reading gauge {name}: {str(e)}")
+        return '\n'.join(lines) + '\n'
+
+    def summary(self) -> Dict[str, Dict]:
+        """Counters and histogram summaries per label set, e.g. {'counters': {'tasks_submitted_total': {'source=nicfi': 10}}}"""
+        def label_key(labels: Labels) -> str:
+            return ','.join(f"{key}={value}" for key, value in labels) or 'all'
+
+        with self._lock:
+            return {
+                'counters': {name: {label_key(labels): value for labels, value in sorted(series.items())}
+                             for name, series in sorted(self.counters.items())},
+                'histograms': {name: {label_key(labels): histogram.summary() for labels, histogram in sorted(series.items())}
+                               for name, series in sorted(self.histograms.items())}
+            }
+
+    def write_summary(self, path, **extra):
+        """Write the JSON summary of the run, with extra top-level fields"""
+        try:
+            path = Path(path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, 'w') as f:
+                json.dump({**extra, **self.summary()}, f, indent=2)
+        except OSError as e:
+            print(f"Error writing metrics summary: {str(e)}")
+
+
+class MetricsServer:
+    """Local HTTP endpoint serving the metrics at /metrics"""
+
+    def __init__(self, metrics: ExportMetrics, port: int, host: str = '127.0.0.1'):
+        """
+        Initialize metrics server
+        Args:
+            metrics: Metrics to serve
+            port: TCP port, 0 picks a free port
+            host: Interface to listen on, local only by default
+        """
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        metrics = self.metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.render_prometheus().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # keep scrapes out of the export log
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
@@ -0,0 +1,156 @@
+"""
+Phase profiler for the export pipeline
+Times the phases of an export run (date ranges, collection build, region calculation,
+feature lookup, export construction, task start, submission waits and monitoring),
+optionally with cProfile and tracemalloc, and writes a per-phase breakdown at run end
+"""
+
+import cProfile
+import io
+import json
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+# Phases in pipeline order, used to order the breakdown
+PHASES = (
+    'date_ranges',          # date range generation
+    'collection_build',     # composite expression of a source and date range
+    'region_calculation',   # export regions of the target indices, batched on the backend
+    'feature_lookup',       # export region of one index or tile
+    'export_construction',  # export task definition
+    'task_start',           # task.start() round trip
+    'submit_wait',          # submission rate limiting and quota backoff
+    'monitor_poll',         # task status polling
+    'monitor_sleep'         # idle wait between polls
+)
+
+
+def profile_phase(profiler: Optional['PhaseProfiler'], name: str):
+    """Context manager timing a phase, a no-op without a profiler"""
+    return profiler.phase(name) if profiler is not None else nullcontext()
+
+
+class PhaseProfiler:
+    """Accumulate wall time per phase across all threads of a run"""
+
+    def __init__(self, use_cprofile: bool = False, use_tracemalloc: bool = False, top_n: int = 30):
+        """
+        Initialize phase profiler
+        Args:
+            use_cprofile: Also profile the thread running the export with cProfile
+            use_tracemalloc: Also trace memory, recording the allocation growth of each phase
+            top_n: Number of functions and allocation sites in the report
+        """
+        self.use_cprofile = use_cprofile
+        self.use_tracemalloc = use_tracemalloc
+        self.top_n = top_n
+        self.phases: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+        self._cprofile = None
+        self._start = None
+        self.elapsed = None
+
+    def start(self):
+        """Start the run clock and the optional profilers"""
+        self._start = time.perf_counter()
+        if self.use_tracemalloc and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if self.use_cprofile:
+            # cProfile only sees the thread that enables it, submission workers are covered by the phase timers
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    def stop(self):
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        if self._start is not None:
+            self.elapsed = time.perf_counter() - self._start
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a phase, adding to its totals"""
+        memory_before = tracemalloc.get_traced_memory()[0] if self.use_tracemalloc and tracemalloc.is_tracing() else None
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            memory_delta = (tracemalloc.get_traced_memory()[0] - memory_before) if memory_before is not None else None
+            with self._lock:
+                totals = self.phases.setdefault(name, {'calls': 0, 'seconds': 0.0, 'max_seconds': 0.0})
+                totals['calls'] += 1
+                totals['seconds'] += seconds
+                totals['max_seconds'] = max(totals['max_seconds'], seconds)
+                if memory_delta is not None:
+                    totals['memory_delta_mb'] = totals.get('memory_delta_mb', 0.0) + memory_delta / 1024 / 1024
+
+    def breakdown(self) -> Dict[str, Any]:
+        """Per-phase totals, phase seconds add up across threads and can exceed the run time"""
+        order = {name: i for i, name in enumerate(PHASES)}
+        with self._lock:
+            phases = {}
+            for name in sorted(self.phases, key=lambda name: (order.get(name, len(order)), name)):
+                totals = self.phases[name]
+                phases[name] = {
+                    'calls': totals['calls'],
+                    'seconds': round(totals['seconds'], 3),
+                    'mean_ms': round(totals['seconds'] / totals['calls'] * 1000, 3),
+                    'max_ms': round(totals['max_seconds'] * 1000, 3),
+                    'share_of_run': round(totals['seconds'] / self.elapsed, 3) if self.elapsed else None
+                }
+                if 'memory_delta_mb' in totals:
+                    phases[name]['memory_delta_mb'] = round(totals['memory_delta_mb'], 3)
+        return {'elapsed_seconds': round(self.elapsed, 3) if self.elapsed else None, 'phases': phases}
+
+    def format_breakdown(self) -> str:
+        """Breakdown as a plain text table"""
+        breakdown = self.breakdown()
+        lines = [f"Profile ({breakdown['elapsed_seconds']} s):",
+                 f"  {'phase':<20} {'calls':>8} {'seconds':>10} {'mean ms':>10} {'max ms':>10} {'share':>7}"]
+        for name, phase in breakdown['phases'].items():
+            share = f"{phase['share_of_run']:.0%}" if phase['share_of_run'] is not None else '-'
+            lines.append(f"  {name:<20} {phase['calls']:>8} {phase['seconds']:>10.3f} {phase['mean_ms']:>10.3f} "
+                         f"{phase['max_ms']:>10.3f} {share:>7}")
+        return '\n'.join(lines)
+
+    def write_report(self, run_dir) -> Path:
+        """
+        Write profile.json, plus profile.pstats and profile.txt with cProfile
+        Args:
+            run_dir: Directory of the run
+        Returns:
+            Path of profile.json
+        """
+        run_dir = Path(run_dir)
+        run_dir.mkdir(parents=True, exist_ok=True)
+        report = self.breakdown()
+
+        if self._cprofile is not None:
+            self._cprofile.dump_stats(run_dir / 'profile.pstats')
+            text = io.StringIO()
+            pstats.Stats(self._cprofile, stream=text).sort_stats('cumulative').print_stats(self.top_n)
+            (run_dir / 'profile.txt').write_text(text.getvalue())
+            report['cprofile'] = str(run_dir / 'profile.pstats')
+
+        if self.use_tracemalloc and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            report['memory'] = {
+                'current_mb': round(current / 1024 / 1024, 3),
+                'peak_mb': round(peak / 1024 / 1024, 3),
+                'top_allocations': [
+                    {'location': str(stat.traceback), 'size_mb': round(stat.size / 1024 / 1024, 3), 'count': stat.count}
+                    for stat in tracemalloc.take_snapshot().statistics('lineno')[:self.top_n]
+                ]
+            }
+            tracemalloc.stop()
+
+        report_file = run_dir / 'profile.json'
+        with open(report_file, 'w') as f:
+            json.dump(report, f, indent=2)
+        return report_file
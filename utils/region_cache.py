@@ -0,0 +1,110 @@
+"""
+Region cache for GEE export tasks
+Stores the export region of every target index so it is computed once per run
+and reused between runs until the shared asset or the region rule changes
+"""
+
+import json
+import re
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+
+DEFAULT_CACHE_DIR = '.region_cache'
+
+
+class RegionCache:
+    """Cache of export regions keyed by (asset id, index, region rule version)"""
+
+    def __init__(self, asset_id: str, rule_version: int, cache_dir=DEFAULT_CACHE_DIR):
+        """
+        Initialize region cache
+        Args:
+            asset_id: Shared asset ID the regions are computed from
+            rule_version: Version of the region size rule used to compute the regions
+            cache_dir: Directory used to persist the cache between runs
+        """
+        self.asset_id = asset_id
+        self.rule_version = rule_version
+        self.asset_version = None
+        self.cache_file = Path(cache_dir) / f"{re.sub(r'[^A-Za-z0-9_.-]', '_', asset_id)}.json"
+        self._regions: Dict[int, Dict[str, Any]] = {}
+
+    def __len__(self):
+        return len(self._regions)
+
+    def __contains__(self, index):
+        return int(index) in self._regions
+
+    def load(self, asset_version: Optional[str] = None) -> bool:
+        """
+        Load cached regions from disk
+        Args:
+            asset_version: Current version of the shared asset, None if unknown
+        Returns:
+            bool: True if cached regions were loaded, False if the cache was empty or stale
+        """
+        self.asset_version = asset_version
+        if not self.cache_file.exists():
+            return False
+
+        try:
+            with open(self.cache_file, 'r') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Error loading region cache: {str(e)}")
+            self.invalidate()
+            return False
+
+        # An unknown asset version keeps the cache, a different one invalidates it
+        stale = (data.get('asset_id') != self.asset_id
+                 or data.get('rule_version') != self.rule_version
+                 or (asset_version is not None and data.get('asset_version') != asset_version))
+        if stale:
+            self.invalidate()
+            return False
+
+        self._regions = {int(index): region for index, region in data.get('regions', {}).items()}
+        return True
+
+    def save(self):
+        """Persist cached regions to disk"""
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            data = {
+                'asset_id': self.asset_id,
+                'asset_version': self.asset_version,
+                'rule_version': self.rule_version,
+                'regions': {str(index): region for index, region in self._regions.items()}
+            }
+            tmp_file = self.cache_file.with_suffix('.tmp')
+            with open(tmp_file, 'w') as f:
+                json.dump(data, f)
+            tmp_file.replace(self.cache_file)
+        except OSError as e:
+            print(f"Error saving region cache: {str(e)}")
+
+    def invalidate(self):
+        """Drop all cached regions in memory and on disk"""
+        self._regions = {}
+        try:
+            self.cache_file.unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Error removing region cache: {str(e)}")
+
+    def get(self, index) -> Optional[Tuple[Dict[str, Any], float]]:
+        """
+        Get cached region for an index
+        Returns:
+            Tuple of (region GeoJSON, shape_size_ha) or None if not cached
+        """
+        region = self._regions.get(int(index))
+        if region is None:
+            return None
+        return region['geometry'], region['shape_size_ha']
+
+    def put(self, index, geometry: Dict[str, Any], shape_size_ha: float):
+        """Store the region GeoJSON and shape size of an index"""
+        self._regions[int(index)] = {'geometry': geometry, 'shape_size_ha': shape_size_ha}
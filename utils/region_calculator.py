@@ -12,8 +12,10 @@ Implements specific size-based rules for different feature areas
 
 
 
-import ee
-from typing import Dict, Any, Tuple
+from typing import TYPE_CHECKING, Dict, Any, Tuple, List, Optional
+
+if TYPE_CHECKING:
+    import ee  # imported on first use, Earth Engine is slow to import
 
 class RegionCalculator:
     def __init__(self):
@@ -26,6 +28,12 @@ class RegionCalculator:
         self.TINY_EXPORT_SIZE = 4 * 10000    # 4 ha for tiny areas
         self.SMALL_EXPORT_SIZE = 10 * 10000   # 10 ha for small areas
         self.MEDIUM_MULTIPLIER = 5           # 5x area for medium areas
+
+        # Bump when the rules above change so cached regions are recomputed
+        self.REGION_RULE_VERSION = 1
+
+        # Number of features fetched per getInfo call in compute_regions
+        self.REGION_BATCH_SIZE = 500
         
         # Define scale settings for different sources
         self.SCALE_SETTINGS = {
@@ -33,7 +41,7 @@ class RegionCalculator:
             'sentinel': 10
         }
 
-    def calculate_area(self, geometry: ee.Geometry) -> float:
+    def calculate_area(self, geometry: 'ee.Geometry') -> float:
         """
         Calculate area of geometry in hectares
         Args:
@@ -48,7 +56,23 @@ class RegionCalculator:
             print(f"Error calculating area: {str(e)}")
             return 0
 
-    def get_export_region(self, feature: ee.Feature) -> Tuple[ee.Geometry, float]:
+    def get_export_size_sqm(self, shape_size: float) -> Optional[float]:
+        """
+        Get the export square size for a feature size
+        Args:
+            shape_size: Feature area in hectares
+        Returns:
+            float: Export area in square meters, None if the feature's bounds are used
+        """
+        if shape_size < self.TINY_AREA_THRESHOLD:
+            return self.TINY_EXPORT_SIZE
+        if shape_size < self.SMALL_AREA_THRESHOLD:
+            return self.SMALL_EXPORT_SIZE
+        if shape_size < self.MEDIUM_AREA_THRESHOLD:
+            return shape_size * 10000 * self.MEDIUM_MULTIPLIER
+        return None
+
+    def get_export_region(self, feature: 'ee.Feature') -> Tuple['ee.Geometry', float]:
         """
         Calculate export region based on feature size
         Args:
@@ -57,15 +81,9 @@ class RegionCalculator:
             Tuple of (export_region, shape_size_ha)
         """
         shape_size = self.calculate_area(feature.geometry())
+        export_size_sqm = self.get_export_size_sqm(shape_size)
         
-        if shape_size < self.MEDIUM_AREA_THRESHOLD:
-            if shape_size < self.TINY_AREA_THRESHOLD:
-                export_size_sqm = self.TINY_EXPORT_SIZE
-            elif shape_size < self.SMALL_AREA_THRESHOLD:
-                export_size_sqm = self.SMALL_EXPORT_SIZE
-            else:
-                export_size_sqm = shape_size * 10000 * self.MEDIUM_MULTIPLIER
-
+        if export_size_sqm is not None:
             # Create a square region centered on the feature's centroid
             centroid = feature.geometry().centroid()
             half_side_length = (export_size_sqm ** 0.5) / 2
@@ -76,6 +94,58 @@ class RegionCalculator:
 
         return export_region, shape_size
 
+    def _export_region_feature(self, feature: 'ee.Feature') -> 'ee.Feature':
+        """Server-side version of get_export_region, mapped over a FeatureCollection"""
+        import ee
+
+        geometry = feature.geometry()
+        shape_size = geometry.area().divide(10000)
+
+        export_size_sqm = ee.Number(ee.Algorithms.If(
+            shape_size.lt(self.TINY_AREA_THRESHOLD),
+            self.TINY_EXPORT_SIZE,
+            ee.Algorithms.If(
+                shape_size.lt(self.SMALL_AREA_THRESHOLD),
+                self.SMALL_EXPORT_SIZE,
+                shape_size.multiply(10000 * self.MEDIUM_MULTIPLIER)
+            )
+        ))
+        half_side_length = export_size_sqm.sqrt().divide(2)
+
+        export_region = ee.Geometry(ee.Algorithms.If(
+            shape_size.lt(self.MEDIUM_AREA_THRESHOLD),
+            geometry.centroid().buffer(half_side_length).bounds(),
+            geometry.bounds()
+        ))
+        return ee.Feature(export_region, {'Index': feature.get('Index'), 'shape_size_ha': shape_size})
+
+    def compute_regions(self, feature_collection: 'ee.FeatureCollection',
+                        indices: List[int]) -> Dict[int, Tuple[Dict[str, Any], float]]:
+        """
+        Calculate export regions for many features with one getInfo call per batch
+        A failed getInfo call is raised, so a missing index always means the feature is not in the asset
+        Args:
+            feature_collection: Shared asset FeatureCollection with an 'Index' property
+            indices: List of indices to calculate
+        Returns:
+            Dictionary of index -> (export region GeoJSON, shape_size_ha)
+        """
+        import ee
+
+        regions = {}
+        indices = list(indices)
+        for start in range(0, len(indices), self.REGION_BATCH_SIZE):
+            batch = indices[start:start + self.REGION_BATCH_SIZE]
+            result = (feature_collection
+                      .filter(ee.Filter.inList('Index', batch))
+                      .map(self._export_region_feature)
+                      .getInfo())
+
+            for feature in result.get('features', []):
+                properties = feature['properties']
+                regions[properties['Index']] = (feature['geometry'], properties['shape_size_ha'])
+        return regions
+
     def format_date_string(self, date_str: str, source_type: str) -> str:
         """
         Format date string based on source type
@@ -87,7 +157,7 @@ class RegionCalculator:
             return date_str[:7]
         return date_str[:4] + date_str[5:7] + date_str[8:]
 
-    def get_export_settings(self, feature: ee.Feature, source_type: str, date_str: str) -> Dict[str, Any]:
+    def get_export_settings(self, feature: 'ee.Feature', source_type: str, date_str: str) -> Dict[str, Any]:
         """
         Get all export settings based on feature and source type
         Args:
@@ -0,0 +1,153 @@
+"""
+Region packer for GEE export tasks
+Clusters spatially close small export regions into shared tiles, so one export task
+per tile and date replaces one task per region, and maps every region to its pixel
+window in the exported tile
+"""
+
+import hashlib
+import json
+import math
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from utils.composite_registry import bounding_box
+
+
+METERS_PER_DEGREE = 111320
+# Earth Engine converts a scale in meters to degrees at the equator for EPSG:4326 exports
+EE_METERS_PER_DEGREE = 111319.49079327357
+
+
+@dataclass
+class RegionTile:
+    """Bounding tile of a cluster of export regions"""
+    tile_id: str
+    bounds: Tuple[float, float, float, float]  # min_x, min_y, max_x, max_y in degrees
+    indices: List[int] = field(default_factory=list)
+
+    @staticmethod
+    def stable_id(indices: List[int], bounds: Tuple[float, float, float, float]) -> str:
+        """
+        Tile ID derived from the members and extent of the tile, e.g. 'tile3f9a0c2b71de'
+        Runs with other targets or packing settings never reuse the ID of a tile with different contents
+        """
+        digest = hashlib.sha1(json.dumps([sorted(indices), list(bounds)]).encode()).hexdigest()
+        return f"tile{digest[:12]}"
+
+    @property
+    def geometry(self) -> Dict[str, Any]:
+        min_x, min_y, max_x, max_y = self.bounds
+        return {'type': 'Polygon',
+                'coordinates': [[[min_x, min_y], [max_x, min_y], [max_x, max_y], [min_x, max_y], [min_x, min_y]]]}
+
+
+class RegionPacker:
+    """Pack export regions into tiles on a regular grid"""
+
+    def __init__(self, tile_size_m: float = 2000, max_regions_per_tile: int = 100, min_regions_per_tile: int = 2):
+        """
+        Initialize region packer
+        Args:
+            tile_size_m: Side of the grid cells regions are clustered in, in meters
+            max_regions_per_tile: Maximum number of regions exported in one tile
+            min_regions_per_tile: Minimum number of regions of a tile, smaller clusters are exported per region
+        """
+        self.tile_size_m = tile_size_m
+        self.max_regions_per_tile = max_regions_per_tile
+        self.min_regions_per_tile = min_regions_per_tile
+
+    @staticmethod
+    def _bounds(geometry: Dict[str, Any]) -> Tuple[float, float, float, float]:
+        ring = bounding_box([geometry])['coordinates'][0]
+        return ring[0][0], ring[0][1], ring[2][0], ring[2][1]
+
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        """Grid cell of a point, cells are tile_size_m wide at the latitude of their row"""
+        cell_lat = self.tile_size_m / METERS_PER_DEGREE
+        row = math.floor(y / cell_lat)
+        row_lat = (row + 0.5) * cell_lat
+        cell_lon = self.tile_size_m / (METERS_PER_DEGREE * max(math.cos(math.radians(row_lat)), 0.01))
+        return row, math.floor(x / cell_lon)
+
+    def pack(self, regions: Dict[int, Dict[str, Any]]) -> Tuple[List[RegionTile], List[int]]:
+        """
+        Cluster regions by the grid cell of their center
+        Args:
+            regions: index -> export region GeoJSON of the regions that can be packed
+        Returns:
+            Tuple of (tiles, indices exported on their own)
+        """
+        cells: Dict[Tuple[int, int], List[Tuple[int, Tuple[float, float, float, float]]]] = {}
+        for index in sorted(regions):
+            bounds = self._bounds(regions[index])
+            center = ((bounds[0] + bounds[2]) / 2, (bounds[1] + bounds[3]) / 2)
+            cells.setdefault(self._cell(*center), []).append((index, bounds))
+
+        tiles, single = [], []
+        for cell in sorted(cells):
+            members = cells[cell]
+            for start in range(0, len(members), self.max_regions_per_tile):
+                chunk = members[start:start + self.max_regions_per_tile]
+                if len(chunk) < self.min_regions_per_tile:
+                    single.extend(index for index, _ in chunk)
+                    continue
+                bounds = (min(b[0] for _, b in chunk), min(b[1] for _, b in chunk),
+                          max(b[2] for _, b in chunk), max(b[3] for _, b in chunk))
+                indices = [index for index, _ in chunk]
+                tiles.append(RegionTile(RegionTile.stable_id(indices, bounds), bounds, indices))
+        return tiles, single
+
+    @staticmethod
+    def pixel_windows(tile: RegionTile, regions: Dict[int, Dict[str, Any]], scale: float) -> Dict[int, List[int]]:
+        """
+        Pixel window of every region of a tile exported in EPSG:4326
+        Windows are computed on the Earth Engine pixel grid and can be off by one pixel at the edges
+        Args:
+            tile: Tile of the regions
+            regions: index -> export region GeoJSON
+            scale: Export scale in meters
+        Returns:
+            index -> [col_off, row_off, width, height]
+        """
+        pixel = scale / EE_METERS_PER_DEGREE
+        tile_col = math.floor(tile.bounds[0] / pixel)
+        tile_row = math.ceil(tile.bounds[3] / pixel)
+        windows = {}
+        for index in tile.indices:
+            min_x, min_y, max_x, max_y = RegionPacker._bounds(regions[index])
+            col_0, col_1 = math.floor(min_x / pixel), math.ceil(max_x / pixel)
+            row_0, row_1 = math.floor(min_y / pixel), math.ceil(max_y / pixel)
+            windows[index] = [col_0 - tile_col, tile_row - row_1, col_1 - col_0, row_1 - row_0]
+        return windows
+
+
+def write_tile_index(path, tiles: List[RegionTile], regions: Dict[int, Dict[str, Any]], scale: float,
+                     source_type: str):
+    """
+    Write the sidecar file mapping every packed index to its tile and pixel window
+    Args:
+        path: JSON file to write
+        tiles: Tiles of the run
+        regions: index -> export region GeoJSON
+        scale: Export scale in meters
+        source_type: Type of imagery the tiles are exported from
+    """
+    data = {
+        'source_type': source_type,
+        'crs': 'EPSG:4326',
+        'scale': scale,
+        'tiles': {},
+        'indices': {}
+    }
+    for tile in tiles:
+        windows = RegionPacker.pixel_windows(tile, regions, scale)
+        data['tiles'][tile.tile_id] = {'bounds': list(tile.bounds), 'indices': tile.indices}
+        for index, window in windows.items():
+            data['indices'][str(index)] = {'tile': tile.tile_id, 'window': window}
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
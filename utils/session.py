@@ -0,0 +1,160 @@
+"""
+Cached Google Earth Engine / Drive session
+Credentials, the Drive client and Earth Engine initialization are created once
+per credential file and project and reused by every caller
+The Google client libraries and Earth Engine are imported on first use
+"""
+
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+
+SCOPES = ['https://www.googleapis.com/auth/drive', 'https://www.googleapis.com/auth/earthengine']
+
+# Seconds an account keeps Earth Engine before yielding to a waiting account, re-initializing costs a few calls
+EE_TURN_SECONDS = 1.0
+
+_sessions: Dict[Tuple[str, Optional[str]], 'Session'] = {}
+_sessions_lock = threading.Lock()
+
+# Earth Engine holds one global initialization, remember which session owns it
+_active_ee_session: Optional['Session'] = None
+
+
+class Session:
+    """Authorized Earth Engine and Drive access for one service account key file"""
+
+    def __init__(self, file_path, project: Optional[str] = None):
+        """
+        Initialize session
+        Args:
+            file_path: Path to the service account key file
+            project: Google Cloud project used for Earth Engine requests, defaults to the project of the key file
+        """
+        self.file_path = str(file_path)
+        self.project = project
+        self.lock = threading.RLock()
+        self._credentials = None
+        self._ee_credentials = None
+        self._drive_service = None
+        self._ee_verified = False
+
+    @property
+    def credentials(self):
+        """Service account credentials, read from the key file once"""
+        with self.lock:
+            if self._credentials is None:
+                from google.oauth2 import service_account
+                self._credentials = service_account.Credentials.from_service_account_file(
+                    self.file_path, scopes=SCOPES)
+            return self._credentials
+
+    @property
+    def drive_service(self):
+        """Drive v3 client, built once and reused"""
+        with self.lock:
+            if self._drive_service is None:
+                from googleapiclient.discovery import build
+                self._drive_service = build('drive', 'v3', credentials=self.credentials)
+            return self._drive_service
+
+    def initialize_ee(self):
+        """
+        Initialize Earth Engine with this session's credentials
+        The connection is only probed the first time, raises on failure
+        """
+        global _active_ee_session
+        with self.lock:
+            if _active_ee_session is self:
+                return
+
+            import ee
+            if self._ee_credentials is None:
+                self._ee_credentials = ee.ServiceAccountCredentials(self.credentials.service_account_email,
+                                                                    self.file_path)
+            ee.Initialize(self._ee_credentials, project=self.project or self.credentials.project_id)
+            if not self._ee_verified:
+                ee.Number(1).getInfo()
+                self._ee_verified = True
+                print("Earth Engine initialized successfully")
+            _active_ee_session = self
+
+
+class _EarthEngineGate:
+    """
+    Serializes Earth Engine requests of different accounts
+    Requests of the account Earth Engine is initialized with run concurrently, a request of another
+    account waits until they are done and re-initializes Earth Engine; once its turn of
+    turn_seconds is over, the current account yields to waiting accounts so no account starves
+    """
+
+    def __init__(self, turn_seconds: float = EE_TURN_SECONDS):
+        self.turn_seconds = turn_seconds
+        self._condition = threading.Condition()
+        self._owner: Optional[Session] = None
+        self._turn_start = 0.0
+        self._users = 0
+        self._waiting = Counter()
+
+    def _can_enter(self, session: Session) -> bool:
+        if self._owner is session:
+            others_waiting = sum(self._waiting.values()) > self._waiting[session]
+            return not others_waiting or time.monotonic() - self._turn_start < self.turn_seconds
+        return not self._users
+
+    @contextmanager
+    def enter(self, session: Session):
+        with self._condition:
+            self._waiting[session] += 1
+            try:
+                while not self._can_enter(session):
+                    # Timed, the turn of the current account may end without any release
+                    self._condition.wait(self.turn_seconds)
+            finally:
+                self._waiting[session] -= 1
+            # No-op unless another session initialized Earth Engine since
+            session.initialize_ee()
+            if self._owner is not session:
+                self._owner = session
+                self._turn_start = time.monotonic()
+            self._users += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._users -= 1
+                self._condition.notify_all()
+
+
+_ee_gate = _EarthEngineGate()
+
+
+def ee_account(session: Session):
+    """
+    Context manager holding Earth Engine initialized with a session's account, for runs that
+    use several accounts at once; must not be nested
+    """
+    return _ee_gate.enter(session)
+
+
+def get_session(file_path, project: Optional[str] = None) -> Session:
+    """Return the cached session for a key file and project, creating it on first use"""
+    key = (str(Path(file_path).resolve()), project)
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = Session(file_path, project)
+            _sessions[key] = session
+        return session
+
+
+def clear_sessions():
+    """Drop all cached sessions, e.g. after a key file was replaced"""
+    global _active_ee_session
+    with _sessions_lock:
+        _sessions.clear()
+        _active_ee_session = None
@@ -0,0 +1,219 @@
+"""
+Simulated Earth Engine backend for load testing
+Runs the export pipeline in-process with configurable latency, failure rates,
+task quota and task durations, without an Earth Engine account
+"""
+
+import heapq
+import math
+import random
+import threading
+import time
+from itertools import count
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.ee_backend import EarthEngineBackend
+from utils.profiler import profile_phase
+
+
+METERS_PER_DEGREE = 111320
+
+
+class SimulatedBackend(EarthEngineBackend):
+    """In-process simulation of the Earth Engine operations used by the export pipeline"""
+
+    name = 'simulated'
+
+    # Error messages of failed tasks, one per failure class
+    TASK_FAILURE_MESSAGES = (
+        "Internal error. Please try again.",
+        "Computation timed out.",
+        "Invalid GeoJSON geometry: self-intersecting polygon.",
+        "User memory limit exceeded."
+    )
+
+    def __init__(self, feature_count: int = 2000, latency: float = 0.0, submit_failure_rate: float = 0.0,
+                 task_failure_rate: float = 0.0, max_active_tasks: int = 3000,
+                 task_duration: Tuple[float, float] = (60, 600), queue_delay: Tuple[float, float] = (0, 30),
+                 time_scale: float = 1.0, seed: Optional[int] = None, asset_version: str = 'simulated-1',
+                 extent: Tuple[float, float, float, float] = (-75, -10, -45, 10)):
+        """
+        Initialize simulated backend
+        Args:
+            feature_count: Number of features in the simulated shared asset, indexed 0..feature_count-1
+            latency: Seconds every backend call blocks, like an RPC round trip
+            submit_failure_rate: Probability that starting an export raises a transient error
+            task_failure_rate: Probability that a started task ends FAILED, with one of TASK_FAILURE_MESSAGES
+            max_active_tasks: Number of READY/RUNNING tasks at which new exports are rejected
+            task_duration: (min, max) simulated seconds a task runs
+            queue_delay: (min, max) simulated seconds a task waits in READY
+            time_scale: Simulated seconds per real second, e.g. 600 runs a 10 minute task in 1 second
+            seed: Random seed for reproducible runs
+            asset_version: Version reported for every asset
+            extent: (min_lon, min_lat, max_lon, max_lat) the features are spread over
+        """
+        self.feature_count = feature_count
+        self.latency = latency
+        self.submit_failure_rate = submit_failure_rate
+        self.task_failure_rate = task_failure_rate
+        self.max_active_tasks = max_active_tasks
+        self.task_duration = task_duration
+        self.queue_delay = queue_delay
+        self.time_scale = time_scale
+        self.asset_version = asset_version
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._task_ids = count(1)
+        self._tasks: Dict[str, Dict[str, Any]] = {}
+        self._active_end_times: List[float] = []
+        self._start_time = time.monotonic()
+        self.call_counts: Dict[str, int] = {}
+
+        # Feature areas follow a long-tailed distribution, most polygons are a few hectares
+        feature_random = random.Random(seed)
+        min_lon, min_lat, max_lon, max_lat = extent
+        self._features = {
+            index: (feature_random.lognormvariate(1, 1), feature_random.uniform(min_lat, max_lat),
+                    feature_random.uniform(min_lon, max_lon))
+            for index in range(feature_count)
+        }
+
+    def _call(self, name: str):
+        """Count a backend call and block for the simulated round trip"""
+        with self._lock:
+            self.call_counts[name] = self.call_counts.get(name, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def now(self) -> float:
+        """Simulated seconds since the backend was created"""
+        return (time.monotonic() - self._start_time) * self.time_scale
+
+    def initialize(self, auth_file):
+        self._call('initialize')
+
+    def get_asset_version(self, asset_id):
+        self._call('get_asset_version')
+        return self.asset_version
+
+    def get_collection_size(self, asset_id):
+        self._call('get_collection_size')
+        return self.feature_count
+
+    def get_property_values(self, asset_id, property_name):
+        self._call('get_property_values')
+        values = list(self._features) if property_name == 'Index' else []
+        return ['Index'], values
+
+    @staticmethod
+    def _square(lat: float, lon: float, half_side_m: float) -> Dict[str, Any]:
+        """GeoJSON square centered on a point"""
+        half_lat = half_side_m / METERS_PER_DEGREE
+        half_lon = half_side_m / (METERS_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01))
+        ring = [[lon - half_lon, lat - half_lat], [lon + half_lon, lat - half_lat],
+                [lon + half_lon, lat + half_lat], [lon - half_lon, lat + half_lat],
+                [lon - half_lon, lat - half_lat]]
+        return {'type': 'Polygon', 'coordinates': [ring]}
+
+    def compute_regions(self, asset_id, indices, region_calculator):
+        self._call('compute_regions')
+        regions = {}
+        for index in indices:
+            feature = self._features.get(int(index))
+            if feature is None:
+                continue
+            shape_size, lat, lon = feature
+            export_size_sqm = region_calculator.get_export_size_sqm(shape_size)
+            if export_size_sqm is None:
+                # Simulated features are squares, their bounds are the feature itself
+                export_size_sqm = shape_size * 10000
+            regions[int(index)] = (self._square(lat, lon, math.sqrt(export_size_sqm) / 2), shape_size)
+        return regions
+
+    def get_composite(self, collection_id, start_date, end_date, reducer='median'):
+        self._call('get_composite')
+        return ('composite', collection_id, start_date, end_date, reducer)
+
+    def get_image(self, asset_id):
+        self._call('get_image')
+        return ('image', asset_id)
+
+    def _active_count(self, now: float) -> int:
+        """Number of tasks not finished at the given simulated time, lock must be held"""
+        while self._active_end_times and self._active_end_times[0] <= now:
+            heapq.heappop(self._active_end_times)
+        return len(self._active_end_times)
+
+    def start_export(self, image, region, description, folder, file_name_prefix, scale,
+                     crs='EPSG:4326', max_pixels=1e13):
+        with profile_phase(self.profiler, 'task_start'):
+            self._call('start_export')
+            return self._start_task(description)
+
+    def start_asset_export(self, image, asset_id, description, region, scale, crs='EPSG:4326', max_pixels=1e13):
+        self._call('start_asset_export')
+        return self._start_task(description)
+
+    def _start_task(self, description: str) -> str:
+        """Queue a simulated task, raising like Earth Engine when the task queue is full"""
+        with self._lock:
+            now = self.now()
+            if self._random.random() < self.submit_failure_rate:
+                raise RuntimeError("Simulated transient backend error, please retry")
+            active = self._active_count(now)
+            if active >= self.max_active_tasks:
+                raise RuntimeError(f"Too many tasks already in the queue ({active}). "
+                                   f"Please wait for some of them to complete.")
+
+            start = now + self._random.uniform(*self.queue_delay)
+            end = start + self._random.uniform(*self.task_duration)
+            error_message = (self._random.choice(self.TASK_FAILURE_MESSAGES)
+                             if self._random.random() < self.task_failure_rate else None)
+            task_id = f"SIM{next(self._task_ids):08d}"
+            self._tasks[task_id] = {
+                'id': task_id,
+                'description': description,
+                'created': now,
+                'start': start,
+                'end': end,
+                'final_state': 'FAILED' if error_message else 'COMPLETED',
+                'error_message': error_message
+            }
+            heapq.heappush(self._active_end_times, end)
+            return task_id
+
+    def _status(self, task: Dict[str, Any], now: float) -> Dict[str, Any]:
+        if now < task['start']:
+            state = 'READY'
+        elif now < task['end']:
+            state = 'RUNNING'
+        else:
+            state = task['final_state']
+
+        status = {
+            'id': task['id'],
+            'state': state,
+            'description': task['description'],
+            'creation_timestamp_ms': int(task['created'] * 1000),
+            'update_timestamp_ms': int(min(now, task['end']) * 1000)
+        }
+        if state != 'READY':
+            status['start_timestamp_ms'] = int(task['start'] * 1000)
+        if state == 'FAILED':
+            status['error_message'] = task['error_message']
+        return status
+
+    def list_tasks(self):
+        self._call('list_tasks')
+        with self._lock:
+            now = self.now()
+            return [{'id': task['id'], 'state': self._status(task, now)['state']} for task in self._tasks.values()]
+
+    def get_task_status(self, task_ids):
+        self._call('get_task_status')
+        with self._lock:
+            now = self.now()
+            return [self._status(self._tasks[task_id], now) if task_id in self._tasks
+                    else {'id': task_id, 'state': 'UNKNOWN'}
+                    for task_id in task_ids]
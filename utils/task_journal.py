@@ -0,0 +1,103 @@
+"""
+Task journal for GEE export runs
+Append-only JSONL record of every planned, submitted, completed, failed and dead-lettered task,
+used to resume a run after a crash without re-submitting finished work
+"""
+
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+
+DEFAULT_RUNS_DIR = 'runs'
+JOURNAL_FILE = 'journal.jsonl'
+
+# Journal events, in the order a task goes through them
+PLANNED = 'planned'
+SUBMITTED = 'submitted'
+COMPLETED = 'completed'
+FAILED = 'failed'
+DEAD_LETTER = 'dead_letter'  # failed for good, not retried by this run or a resume
+
+
+def task_key(source_type: str, index, start_date: str) -> str:
+    """Key identifying one (source, index, date range) export"""
+    return f"{source_type}|{index}|{start_date}"
+
+
+class TaskJournal:
+    """Append-only journal of the tasks of one export run"""
+
+    def __init__(self, run_dir):
+        """
+        Initialize task journal
+        Args:
+            run_dir: Directory of the run, created if missing
+        """
+        self.run_dir = Path(run_dir)
+        self.journal_file = self.run_dir / JOURNAL_FILE
+        self._lock = threading.Lock()
+        self._file = None
+
+    @classmethod
+    def new_run(cls, runs_dir=DEFAULT_RUNS_DIR, name: str = 'export') -> 'TaskJournal':
+        """Create a journal in a new timestamped run directory"""
+        run_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{name}"
+        return cls(Path(runs_dir) / run_id)
+
+    def exists(self) -> bool:
+        return self.journal_file.exists()
+
+    def record(self, event: str, **fields):
+        """Append one event to the journal"""
+        entry = {'event': event, 'time': datetime.now().isoformat(timespec='seconds'), **fields}
+        line = json.dumps(entry, default=str)
+        with self._lock:
+            if self._file is None:
+                self.run_dir.mkdir(parents=True, exist_ok=True)
+                self._file = open(self.journal_file, 'a')
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def close(self):
+        """Close the journal file"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def record_run(self, **params):
+        """Record the parameters needed to resume the run"""
+        self.record('run', **params)
+
+    def load(self) -> Tuple[Optional[Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+        """
+        Replay the journal
+        Returns:
+            Tuple of (run parameters, dictionary of task key -> latest task entry)
+        """
+        run_params = None
+        tasks = {}
+        if not self.exists():
+            return run_params, tasks
+
+        with open(self.journal_file, 'r') as f:
+            for line_number, line in enumerate(f, 1):
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash can leave a partial last line
+                    print(f"Skipping unreadable journal line {line_number}")
+                    continue
+
+                event = entry.pop('event', None)
+                if event == 'run':
+                    entry.pop('time', None)
+                    run_params = entry
+                elif 'key' in entry:
+                    task = tasks.setdefault(entry['key'], {})
+                    task.update(entry)
+                    task['event'] = event
+        return run_params, tasks
@@ -0,0 +1,286 @@
+"""
+Task plan for GEE export runs
+Holds the (export unit, date range) tasks of one source as datetime64 period arrays
+and a bit mask over periods x units, so a plan of millions of tasks takes a few MB
+and is counted, sliced, sharded and filtered without building a tuple per task
+"""
+
+from datetime import datetime
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.export_job import MONTHLY, SourceJob
+
+
+# Set bits per byte value, for counting tasks in the packed mask
+POPCOUNT = np.array([bin(value).count('1') for value in range(256)], dtype=np.uint8)
+
+# Periods unpacked at once when a plan is sharded
+SHARD_CHUNK_PERIODS = 64
+
+# Units unpacked at once when a plan is walked unit by unit
+UNIT_CHUNK_SIZE = 4096
+
+# Task orders of a run
+DATE_MAJOR = 'date'  # every unit of a period before the next period
+INDEX_MAJOR = 'index'  # every period of a unit before the next unit, in target list order
+PRIORITY = 'priority'  # index-major, units sorted by a priority column of the target list
+PLAN_ORDERS = (DATE_MAJOR, INDEX_MAJOR, PRIORITY)
+
+
+def date_periods(start_date: str, end_date: str, cadence: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Date periods of a cadence between two dates
+    Monthly periods run from the first of a month to the first of the next month, dekadal periods
+    split a month into days 1-10, 11-20 and 21 to the month end, the first starting at start_date
+    Args:
+        start_date: Start date in YYYY-MM-DD format
+        end_date: End date in YYYY-MM-DD format
+        cadence: 'monthly' or 'dekadal'
+    Returns:
+        Tuple of (start dates, end dates) as datetime64[D] arrays
+    """
+    try:
+        start = np.datetime64(datetime.strptime(start_date, "%Y-%m-%d").date(), 'D')
+        end = np.datetime64(datetime.strptime(end_date, "%Y-%m-%d").date(), 'D')
+    except ValueError as e:
+        raise ValueError(f"Invalid date format. Use YYYY-MM-DD: {str(e)}")
+
+    # Months whose first day is before the end date
+    months = np.arange(start.astype('datetime64[M]'), (end - 1).astype('datetime64[M]') + 1)
+    firsts = months.astype('datetime64[D]')
+    next_firsts = (months + 1).astype('datetime64[D]')
+    if cadence == MONTHLY:
+        return firsts, next_firsts
+
+    if start >= end:
+        months = months[:0]
+        firsts, next_firsts = firsts[:0], next_firsts[:0]
+    starts = np.stack([firsts, firsts + 10, firsts + 20], axis=1)
+    ends = np.stack([firsts + 9, firsts + 19, next_firsts - 1], axis=1)
+    if len(months):
+        starts[0, 0] = start
+    return starts.ravel(), ends.ravel()
+
+
+class TaskPlan:
+    """Tasks of one source, one per selected (period, export unit) pair, in date-major order"""
+
+    def __init__(self, job: SourceJob, units: Sequence, starts: np.ndarray, ends: np.ndarray,
+                 mask: Optional[np.ndarray] = None):
+        """
+        Initialize task plan
+        Args:
+            job: Source job of the tasks
+            units: Target indices and tile IDs
+            starts: Period start dates, datetime64[D]
+            ends: Period end dates, datetime64[D]
+            mask: Packed bits of shape (periods, ceil(units / 8)) selecting the tasks, all tasks if None
+        """
+        self.job = job
+        self.units = list(units)
+        self.starts = starts
+        self.ends = ends
+        self.mask = mask
+        self._date_ranges = None
+        self._row_counts = None
+
+    @property
+    def n_periods(self) -> int:
+        return len(self.starts)
+
+    @property
+    def n_units(self) -> int:
+        return len(self.units)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory of the plan arrays"""
+        return self.starts.nbytes + self.ends.nbytes + (self.mask.nbytes if self.mask is not None else 0)
+
+    @property
+    def date_ranges(self) -> List[Tuple[str, str]]:
+        """(start_date, end_date) strings of every period"""
+        if self._date_ranges is None:
+            self._date_ranges = list(zip(np.datetime_as_string(self.starts, unit='D').tolist(),
+                                         np.datetime_as_string(self.ends, unit='D').tolist()))
+        return self._date_ranges
+
+    def row_counts(self) -> np.ndarray:
+        """Number of tasks of every period"""
+        if self._row_counts is None:
+            if self.mask is None:
+                self._row_counts = np.full(self.n_periods, self.n_units, dtype=np.int64)
+            else:
+                self._row_counts = POPCOUNT[self.mask].sum(axis=1, dtype=np.int64)
+        return self._row_counts
+
+    def __len__(self) -> int:
+        return int(self.row_counts().sum())
+
+    def period_mask(self, period: int) -> np.ndarray:
+        """Boolean array of the units planned for a period"""
+        if self.mask is None:
+            return np.ones(self.n_units, dtype=bool)
+        return np.unpackbits(self.mask[period], count=self.n_units).astype(bool)
+
+    def iter_periods(self) -> Iterator[Tuple[int, Tuple[str, str], List[Any]]]:
+        """Yield (period, date_range, units) for every period with planned tasks"""
+        counts = self.row_counts()
+        for period, date_range in enumerate(self.date_ranges):
+            if not counts[period]:
+                continue
+            if self.mask is None:
+                yield period, date_range, self.units
+            else:
+                yield period, date_range, [self.units[column] for column in
+                                           np.flatnonzero(self.period_mask(period)).tolist()]
+
+    def __iter__(self) -> Iterator[Tuple[Any, Tuple[str, str]]]:
+        """Yield (unit, date_range) tasks in date-major order"""
+        for _, date_range, units in self.iter_periods():
+            for unit in units:
+                yield unit, date_range
+
+    def iter_units(self, columns: Optional[Sequence[int]] = None) -> Iterator[Tuple[Any, List[Tuple[str, str]]]]:
+        """
+        Yield (unit, date_ranges) for every unit, so all tasks of a unit are handed out together
+        Units without planned tasks are yielded with no date ranges, so plans of the same units stay aligned
+        Args:
+            columns: Unit positions in the order to walk them, defaults to the order of the units
+        """
+        if columns is None:
+            columns = np.arange(self.n_units)
+        columns = np.asarray(columns, dtype=np.int64)
+        date_ranges = self.date_ranges
+        for chunk_start in range(0, len(columns), UNIT_CHUNK_SIZE):
+            chunk = columns[chunk_start:chunk_start + UNIT_CHUNK_SIZE]
+            if self.mask is None:
+                for column in chunk.tolist():
+                    yield self.units[column], date_ranges
+                continue
+            # Bits of the chunk's units for every period, read from their bytes without unpacking whole rows
+            bits = (self.mask[:, chunk >> 3] >> (7 - (chunk & 7)).astype(np.uint8)) & 1
+            for position, column in enumerate(chunk.tolist()):
+                yield self.units[column], [date_ranges[period] for period in np.flatnonzero(bits[:, position]).tolist()]
+
+    def _with_mask(self, mask: np.ndarray) -> 'TaskPlan':
+        return TaskPlan(self.job, self.units, self.starts, self.ends, mask)
+
+    def _full_mask(self) -> np.ndarray:
+        """Copy of the packed mask, with every task set if the plan has no mask"""
+        if self.mask is not None:
+            return self.mask.copy()
+        row = np.packbits(np.ones(self.n_units, dtype=bool))
+        return np.tile(row, (self.n_periods, 1))
+
+    def filter(self, keep: np.ndarray) -> 'TaskPlan':
+        """
+        Keep the tasks selected by a boolean array
+        Args:
+            keep: Boolean array per unit (units,), per period (periods,) or per task (periods, units)
+        Returns:
+            TaskPlan: Plan of the kept tasks
+        """
+        keep = np.asarray(keep, dtype=bool)
+        if keep.shape == (self.n_units,):
+            packed = np.packbits(keep)[None, :]
+        elif keep.shape == (self.n_periods,):
+            packed = np.where(keep[:, None], np.uint8(0xFF), np.uint8(0))
+        elif keep.shape == (self.n_periods, self.n_units):
+            packed = np.packbits(keep, axis=1)
+        else:
+            raise ValueError(f"Expected a mask of shape ({self.n_units},), ({self.n_periods},) or "
+                             f"({self.n_periods}, {self.n_units}), got {keep.shape}")
+        return self._with_mask(self._full_mask() & packed)
+
+    def exclude(self, tasks: Iterable[Tuple[str, Any]]) -> 'TaskPlan':
+        """
+        Drop tasks, e.g. the ones finished by an earlier attempt
+        Args:
+            tasks: (period start date, unit) pairs, units may be given as strings; pairs not in the plan are ignored
+        Returns:
+            TaskPlan: Plan without the tasks, the plan itself if none of them is planned
+        """
+        periods = {start: period for period, (start, _) in enumerate(self.date_ranges)}
+        columns = {}
+        for column, unit in enumerate(self.units):
+            columns[unit] = columns[str(unit)] = column
+
+        rows, cols = [], []
+        for start, unit in tasks:
+            period, column = periods.get(start), columns.get(unit)
+            if period is not None and column is not None:
+                rows.append(period)
+                cols.append(column)
+        if not rows:
+            return self
+
+        mask = self._full_mask()
+        cols = np.asarray(cols)
+        np.bitwise_and.at(mask, (np.asarray(rows), cols >> 3),
+                          ~np.left_shift(1, 7 - (cols & 7)).astype(np.uint8))
+        return self._with_mask(mask)
+
+    def shard(self, shard_index: int, shard_count: int) -> 'TaskPlan':
+        """
+        Split the plan by export unit, every shard_count-th unit from shard_index
+        All periods of a unit stay in the same shard
+        """
+        if not 0 <= shard_index < shard_count:
+            raise ValueError(f"Shard index {shard_index} out of range for {shard_count} shards")
+        units = self.units[shard_index::shard_count]
+        if self.mask is None:
+            return TaskPlan(self.job, units, self.starts, self.ends)
+
+        chunks = []
+        for start in range(0, self.n_periods, SHARD_CHUNK_PERIODS):
+            bits = np.unpackbits(self.mask[start:start + SHARD_CHUNK_PERIODS], axis=1, count=self.n_units)
+            chunks.append(np.packbits(bits[:, shard_index::shard_count], axis=1))
+        mask = np.concatenate(chunks) if chunks else np.zeros((0, (len(units) + 7) // 8), dtype=np.uint8)
+        return TaskPlan(self.job, units, self.starts, self.ends, mask)
+
+    def _locate(self, rank: int) -> Tuple[int, int]:
+        """(period, column) of the task at a rank"""
+        cumulative = np.cumsum(self.row_counts())
+        period = int(np.searchsorted(cumulative, rank, side='right'))
+        offset = rank - (int(cumulative[period - 1]) if period else 0)
+        return period, int(np.flatnonzero(self.period_mask(period))[offset])
+
+    def __getitem__(self, item):
+        """Task (unit, date_range) at a rank, or the plan of a contiguous slice of tasks"""
+        length = len(self)
+        if isinstance(item, slice):
+            start, stop, step = item.indices(length)
+            if step != 1:
+                raise ValueError("Task plans only support contiguous slices, use shard() to split a plan")
+            return self._slice(start, max(start, stop))
+
+        rank = item + length if item < 0 else item
+        if not 0 <= rank < length:
+            raise IndexError("Task plan index out of range")
+        period, column = self._locate(rank)
+        return self.units[column], self.date_ranges[period]
+
+    def _slice(self, start: int, stop: int) -> 'TaskPlan':
+        length = len(self)
+        if start == 0 and stop == length:
+            return self
+        mask = self._full_mask()
+        if start == stop:
+            mask[:] = 0
+            return self._with_mask(mask)
+
+        first_period, first_column = self._locate(start)
+        last_period, last_column = self._locate(stop - 1)
+        mask[:first_period] = 0
+        mask[last_period + 1:] = 0
+        for period in {first_period, last_period}:
+            bits = np.unpackbits(mask[period], count=self.n_units)
+            if period == first_period:
+                bits[:first_column] = 0
+            if period == last_period:
+                bits[last_column + 1:] = 0
+            mask[period] = np.packbits(bits)
+        return self._with_mask(mask)
@@ -0,0 +1,153 @@
+"""
+Sliding-window scheduler for GEE export tasks
+Keeps the number of in-flight tasks near a target and tops up as soon as slots free,
+resubmitting retried jobs once their backoff delay has passed
+"""
+
+import heapq
+import threading
+import time
+from datetime import datetime
+from itertools import chain, count, islice
+from typing import Any, Callable, Iterable, List, Optional
+
+from utils.task_submitter import TaskSubmitter
+from utils.task_tracker import TaskTracker
+
+
+class TaskScheduler:
+    """Submit jobs while keeping the number of active tasks below a limit"""
+
+    def __init__(self, tracker: TaskTracker, max_in_flight: int = 2000,
+                 log_callback: Optional[Callable[[str], None]] = None,
+                 submitter: Optional[TaskSubmitter] = None,
+                 failure_callback: Optional[Callable[[Any, Exception], bool]] = None):
+        """
+        Initialize task scheduler
+        Args:
+            tracker: Task tracker holding the state of submitted tasks
+            max_in_flight: Target number of active tasks on the account
+            log_callback: Optional callback receiving log messages
+            submitter: Task submitter used to submit jobs, serial if not provided
+            failure_callback: Optional callback receiving each job whose submission failed and the error,
+                which retries or records the failure; failed_count only counts failures without a callback
+        """
+        self.tracker = tracker
+        self.submitter = submitter or TaskSubmitter(max_workers=1, min_submit_interval=0)
+        self.max_in_flight = max_in_flight
+        self.log_callback = log_callback
+        self.failure_callback = failure_callback
+        self.submitted_count = 0
+        self.failed_count = 0
+        self._submit = None
+        self._retries = []  # heap of (ready time, sequence, job)
+        self._retry_sequence = count()
+        self._retry_lock = threading.Lock()
+
+    def log_message(self, message):
+        """Log a message to the console"""
+        print(message)
+        if self.log_callback:
+            self.log_callback(message)
+
+    def retry(self, job: Any, delay: float = 0):
+        """Queue a job for resubmission once delay seconds have passed"""
+        with self._retry_lock:
+            heapq.heappush(self._retries, (time.monotonic() + delay, next(self._retry_sequence), job))
+
+    def pending_retries(self) -> int:
+        """Number of queued retries, due or not"""
+        with self._retry_lock:
+            return len(self._retries)
+
+    def _ready_retries(self, limit: int) -> List[Any]:
+        """Pop up to limit retries whose delay has passed"""
+        ready = []
+        now = time.monotonic()
+        with self._retry_lock:
+            while self._retries and len(ready) < limit and self._retries[0][0] <= now:
+                ready.append(heapq.heappop(self._retries)[2])
+        return ready
+
+    def _submit_batch(self, batch: Iterable[Any], submit: Callable[[Any], None]) -> int:
+        """Submit a batch, consumed lazily, handing failures to the failure callback"""
+        submitted, failed = self.submitter.submit_all(batch, submit)
+        self.submitted_count += submitted
+        for job, error in failed:
+            if self.failure_callback is not None:
+                # Retried or dead-lettered by the callback, which records the failure
+                self.failure_callback(job, error)
+                continue
+            self.failed_count += 1
+            print(f"Error submitting job {job}: {str(error)}")
+        return submitted
+
+    def run(self, jobs: Iterable[Any], submit: Callable[[Any], None]):
+        """
+        Submit all jobs, topping up the in-flight window whenever slots free
+        Args:
+            jobs: Iterable of jobs, consumed lazily
+            submit: Callable submitting one job and registering it with the tracker,
+                raising on failure
+        """
+        jobs = iter(jobs)
+        exhausted = False
+        self._submit = submit
+        finished = self.tracker.poll()
+
+        try:
+            while not exhausted:
+                free_slots = max(0, self.max_in_flight - self.tracker.in_flight_count())
+
+                # Retries go first, their jobs are already overdue
+                batch = self._ready_retries(free_slots)
+                # New jobs are submitted as they are produced, not after the whole window is built
+                wanted = free_slots - len(batch)
+                pulled = count()
+                new_jobs = (job for job, _ in zip(islice(jobs, wanted), pulled))
+                submitted = self._submit_batch(chain(batch, new_jobs), submit)
+                exhausted = next(pulled) < wanted
+
+                if exhausted:
+                    break
+
+                print(f"\n{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+                self.log_message(f"Active tasks: {self.tracker.in_flight_count()}, submitted {submitted} new tasks, "
+                                 f"checking free slots again in {self.tracker.next_interval(finished):.0f} seconds...")
+                finished = self.tracker.wait_interval()
+        finally:
+            self.submitter.shutdown()
+
+    def wait_until_done(self):
+        """Wait until every task submitted by this run has finished, resubmitting queued retries"""
+        finished = 0
+        try:
+            # Retries can only be resubmitted after run() has provided the submit callable
+            while self.tracker.active_count() > 0 or (self.pending_retries() and self._submit is not None):
+                free_slots = 0
+                if self.pending_retries() and self._submit is not None:
+                    free_slots = max(0, self.max_in_flight - self.tracker.in_flight_count())
+                    self._submit_batch(self._ready_retries(free_slots), self._submit)
+
+                if self.tracker.active_count() == 0:
+                    if free_slots == 0:
+                        # Tasks of other runs fill the account, wait a poll interval and count them again
+                        interval = self.tracker.next_interval(0)
+                        self.log_message(f"No free task slots for {self.pending_retries()} queued retries, "
+                                         f"checking again in {interval:.0f} seconds...")
+                        time.sleep(interval)
+                        self.tracker.refresh_external()
+                        continue
+                    # Nothing to poll, sleep until the next retry is due
+                    with self._retry_lock:
+                        next_retry = self._retries[0][0] if self._retries else time.monotonic()
+                    time.sleep(max(0.0, next_retry - time.monotonic()))
+                    continue
+
+                retries = f" and {self.pending_retries()} queued retries" if self.pending_retries() else ""
+                print(f"\n{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+                self.log_message(f"Waiting for {self.tracker.active_count()} active tasks{retries}, "
+                                 f"checking again in {self.tracker.next_interval(finished):.0f} seconds...")
+                finished = self.tracker.wait_interval()
+        finally:
+            self.submitter.shutdown()
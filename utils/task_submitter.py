@@ -0,0 +1,111 @@
+"""
+Parallel task submitter for GEE export tasks
+Builds and starts export tasks from a bounded worker pool with per-worker
+rate limiting and retries on quota and transient errors
+"""
+
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+from utils.failure_policy import QUOTA, TRANSIENT, RetryPolicy, classify_failure
+from utils.profiler import profile_phase
+
+
+# Failures retried in the worker, other classes are handed back to the caller
+SUBMIT_RETRY_CLASSES = (QUOTA, TRANSIENT)
+
+
+class TaskSubmitter:
+    """Submit jobs concurrently from a bounded thread pool"""
+
+    def __init__(self, max_workers: int = 8, min_submit_interval: float = 0.2,
+                 max_retries: int = 5, retry_delay: float = 5, retry_policy: Optional[RetryPolicy] = None):
+        """
+        Initialize task submitter
+        Args:
+            max_workers: Number of worker threads submitting tasks
+            min_submit_interval: Minimum seconds between two submissions of the same worker
+            max_retries: Number of retries for a job failing on a quota or transient error
+            retry_delay: Initial retry delay in seconds, doubled after every retry
+            retry_policy: Retry policy overriding max_retries and retry_delay
+        """
+        self.max_workers = max(1, max_workers)
+        self.min_submit_interval = min_submit_interval
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.retry_policy = retry_policy or RetryPolicy(max_retries=max_retries, base_delay=retry_delay)
+        self._executor = None
+        self._worker_state = threading.local()
+        self.profiler = None  # optional PhaseProfiler timing submission waits
+
+    def _rate_limit(self):
+        """Wait until this worker may submit again"""
+        last_submit = getattr(self._worker_state, 'last_submit', 0)
+        wait = self.min_submit_interval - (time.monotonic() - last_submit)
+        if wait > 0:
+            with profile_phase(self.profiler, 'submit_wait'):
+                time.sleep(wait)
+        self._worker_state.last_submit = time.monotonic()
+
+    def _submit_with_retry(self, job: Any, submit: Callable[[Any], None]):
+        """Submit one job, retrying with exponential backoff on quota and transient errors"""
+        attempt = 0
+        while True:
+            self._rate_limit()
+            try:
+                return submit(job)
+            except Exception as e:
+                failure_class = classify_failure(e)
+                if failure_class not in SUBMIT_RETRY_CLASSES or not self.retry_policy.should_retry(failure_class, attempt):
+                    raise
+                delay = self.retry_policy.delay(attempt)
+                print(f"{failure_class.capitalize()} error submitting job {job}, "
+                      f"retrying in {delay:.0f} seconds: {str(e)}")
+                with profile_phase(self.profiler, 'submit_wait'):
+                    time.sleep(delay)
+                attempt += 1
+
+    def submit_all(self, jobs: Iterable[Any], submit: Callable[[Any], None]) -> Tuple[int, List[Tuple[Any, Exception]]]:
+        """
+        Submit jobs concurrently and wait for all of them
+        Jobs are pulled one at a time and handed to a worker as soon as one is free, so a slow
+        job iterator does not hold back the jobs it has already produced
+        Args:
+            jobs: Jobs to submit, consumed lazily
+            submit: Callable submitting one job, raising on failure
+        Returns:
+            Tuple of (number of submitted jobs, list of (job, error) for failed jobs)
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix='task-submit')
+
+        futures = {}
+        submitted = 0
+        failed = []
+
+        def collect(done):
+            nonlocal submitted
+            for future in done:
+                job = futures.pop(future)
+                try:
+                    future.result()
+                    submitted += 1
+                except Exception as e:
+                    failed.append((job, e))
+
+        for job in jobs:
+            # Keep a job queued per worker, pull the next one once a worker is free
+            if len(futures) >= 2 * self.max_workers:
+                collect(wait(futures, return_when=FIRST_COMPLETED)[0])
+            futures[self._executor.submit(self._submit_with_retry, job, submit)] = job
+        collect(list(as_completed(futures)))
+        return submitted, failed
+
+    def shutdown(self):
+        """Stop the worker pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
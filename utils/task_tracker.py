@@ -0,0 +1,152 @@
+"""
+Task status tracker for GEE export tasks
+Polls only the tasks submitted by this run and adapts the polling interval
+to how fast tasks are completing
+"""
+
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional
+
+from utils.ee_backend import EarthEngineBackend, EEBackend
+from utils.profiler import profile_phase
+
+
+ACTIVE_STATES = ('UNSUBMITTED', 'READY', 'RUNNING', 'CANCEL_REQUESTED')
+# UNKNOWN: the backend has no record of the task, it is lost and has to be submitted again
+FINISHED_STATES = ('COMPLETED', 'FAILED', 'CANCELLED', 'UNKNOWN')
+UNKNOWN_TASK_ERROR = 'Task unknown to the backend'
+
+
+class TaskTracker:
+    """In-memory state table of the tasks submitted by this run"""
+
+    def __init__(self, backend: Optional[EarthEngineBackend] = None, min_interval: float = 30, max_interval: float = 600,
+                 backoff_factor: float = 2, status_batch_size: int = 100,
+                 external_refresh_polls: int = 10,
+                 finished_callback: Optional[Callable[[Dict[str, Any]], None]] = None):
+        """
+        Initialize task tracker
+        Args:
+            backend: Earth Engine backend queried for task states
+            min_interval: Shortest wait between polls in seconds
+            max_interval: Longest wait between polls in seconds
+            backoff_factor: Interval multiplier when no task finished since the last poll
+            status_batch_size: Number of task IDs per getTaskStatus call
+            external_refresh_polls: Polls between recounts of tasks not submitted by this run
+            finished_callback: Optional callback receiving each task entry when it finishes
+        """
+        self.backend = backend or EEBackend()
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff_factor = backoff_factor
+        self.status_batch_size = status_batch_size
+        self.external_refresh_polls = external_refresh_polls
+        self.finished_callback = finished_callback
+
+        self.interval = min_interval
+        self.tasks: Dict[str, Dict[str, Any]] = {}
+        self.state_counts = Counter()
+        self.external_active = 0
+        self._polls_since_refresh = None
+        self.profiler = None  # optional PhaseProfiler timing polls and waits
+
+    def register(self, task_id: str, **info):
+        """Add a newly submitted task to the state table"""
+        self.tasks[task_id] = {'id': task_id, 'state': 'READY', **info}
+        self.state_counts['READY'] += 1
+
+    def forget(self, task_id: str):
+        """Drop a task from the state table"""
+        task = self.tasks.pop(task_id, None)
+        if task is not None:
+            self.state_counts[task['state']] -= 1
+
+    def active_count(self) -> int:
+        """Number of this run's tasks that still hold a task slot"""
+        return sum(self.state_counts[state] for state in ACTIVE_STATES)
+
+    def in_flight_count(self) -> int:
+        """Number of task slots in use on the account, including tasks from other runs"""
+        return self.active_count() + self.external_active
+
+    def active_ids(self) -> List[str]:
+        return [task_id for task_id, task in self.tasks.items() if task['state'] in ACTIVE_STATES]
+
+    def refresh_external(self):
+        """Count active tasks on the account that were not submitted by this run"""
+        try:
+            tasks = self.backend.list_tasks()
+            self.external_active = len([task for task in tasks
+                                        if task['state'] in ACTIVE_STATES and task['id'] not in self.tasks])
+        except Exception as e:
+            print(f"Error checking GEE task list: {str(e)}")
+        self._polls_since_refresh = 0
+
+    def poll(self) -> int:
+        """
+        Update the state of active tasks with batched getTaskStatus calls
+        Returns:
+            int: Number of tasks that finished since the last poll
+        """
+        with profile_phase(self.profiler, 'monitor_poll'):
+            return self._poll()
+
+    def _poll(self) -> int:
+        if self._polls_since_refresh is None or self._polls_since_refresh >= self.external_refresh_polls:
+            self.refresh_external()
+        self._polls_since_refresh += 1
+
+        finished = 0
+        active_ids = self.active_ids()
+        for start in range(0, len(active_ids), self.status_batch_size):
+            batch = active_ids[start:start + self.status_batch_size]
+            try:
+                statuses = self.backend.get_task_status(batch)
+            except Exception as e:
+                print(f"Error checking task status: {str(e)}")
+                continue
+
+            for status in statuses:
+                task = self.tasks.get(status.get('id'))
+                if task is None:
+                    continue
+                if self._update_task(task, status) and task['state'] in FINISHED_STATES:
+                    if task['state'] == 'UNKNOWN':
+                        task['error_message'] = UNKNOWN_TASK_ERROR
+                        print(f"Task {task['id']} ({task.get('key')}) is unknown to the backend")
+                    finished += 1
+                    if self.finished_callback:
+                        self.finished_callback(task)
+        return finished
+
+    def _update_task(self, task: Dict[str, Any], status: Dict[str, Any]) -> bool:
+        """Apply a status to the state table, returning True if the state changed"""
+        old_state = task['state']
+        task.update({key: value for key, value in status.items() if key != 'id'})
+        new_state = task['state']
+        if new_state == old_state:
+            return False
+        self.state_counts[old_state] -= 1
+        self.state_counts[new_state] += 1
+        return True
+
+    def next_interval(self, finished: int) -> float:
+        """
+        Adapt the polling interval to the completion rate
+        Short while tasks are finishing, backing off while the queue is not moving
+        """
+        if finished > 0:
+            self.interval = max(self.min_interval, self.interval / self.backoff_factor)
+        else:
+            self.interval = min(self.max_interval, self.interval * self.backoff_factor)
+        return self.interval
+
+    def wait_interval(self) -> int:
+        """Sleep for the current interval, then poll; returns the number of finished tasks"""
+        with profile_phase(self.profiler, 'monitor_sleep'):
+            time.sleep(self.interval)
+        return self.poll()
+
+    def summary(self) -> Dict[str, int]:
+        return {state: count for state, count in self.state_counts.items() if count}
@@ -3,47 +3,170 @@ TIF Downloader module for handling Google Earth Engine exports
 Supports both NICFI and Sentinel imagery with different time intervals
 """
 
-from datetime import datetime, timedelta
+import io
+import json
+import threading
 import time
-from typing import List, Tuple
-import ee
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 from pathlib import Path
-import pandas as pd
-from utils.auth_validator import get_credentials
+import numpy as np
+from utils.auth_validator import return_folder_file_prefixes
+from utils.composite_registry import CompositeRegistry, bounding_box
+from utils.config import Config
+from utils.ee_backend import get_backend
+from utils.export_account import Credential, ExportAccount
+from utils.export_job import SourceJob
+from utils.export_pipeline import ExportPipeline
+from utils.failure_policy import RetryPolicy, classify_failure
+from utils.metrics import ExportMetrics, MetricsServer
+from utils.profiler import PhaseProfiler, profile_phase
 from utils.region_calculator import RegionCalculator
+from utils.region_cache import RegionCache, DEFAULT_CACHE_DIR
+from utils.region_packer import RegionPacker, RegionTile, write_tile_index
+from utils.task_scheduler import TaskScheduler
+from utils.task_submitter import TaskSubmitter
+from utils.task_tracker import TaskTracker
+from utils.task_plan import TaskPlan, date_periods, DATE_MAJOR, PRIORITY, PLAN_ORDERS
+from utils.task_journal import (TaskJournal, task_key, DEFAULT_RUNS_DIR, PLANNED, SUBMITTED, COMPLETED, FAILED,
+                                DEAD_LETTER)
 
 class TifDownloader:
     """Main class for downloading TIF files from Google Earth Engine"""
     
-    def __init__(self, config, auth_file, target_indices, start_date, end_date, source_type,log_callback=None):
+    def __init__(self, config, auth_file, target_indices, start_date, end_date, source_type,log_callback=None,
+                 journal=None, skip_existing=None, backend=None, jobs: Optional[List[SourceJob]] = None,
+                 plan_order: Optional[str] = None, priorities: Optional[Dict[Any, float]] = None,
+                 credentials: Optional[List[Credential]] = None):
         """
         Initialize TIF downloader
         Args:
             config: Configuration object containing settings
-            auth_file: Path to authentication file
+            auth_file: Path to authentication file, ignored when credentials are given
             target_indices: List of target indices to process
+            source_type: Type of imagery (nicfi/sentinel), ignored when jobs are given
+            journal: Task journal of the run, a new run directory is created if not provided
+            skip_existing: Skip exports already in the Drive folder, defaults to export_settings.skip_existing
+            backend: Earth Engine backend or backend name ('ee' or 'simulated'), defaults to
+                export_settings.backend, created with the options in export_settings.backend_options
+            jobs: Sources to export in one run, each with its own folder, cadence and scale,
+                defaults to a single job for source_type
+            plan_order: Task order, 'date' (date-major), 'index' (index-major) or 'priority' (index-major by
+                priority), defaults to export_settings.plan_order
+            priorities: Priority of every target index for the 'priority' order, lower values first,
+                indices without a priority last
+            credentials: Service accounts to spread the tasks over, each with its own task slots and
+                scheduler, defaults to auth_file in the project of the key file
         """
         self.config = config
-        self.auth_file = Path(auth_file)
+        self.credentials = credentials or [Credential(str(auth_file))]
+        self.auth_file = Path(self.credentials[0].auth_file)
         self.target_indices = target_indices
-        self.task_count = 0  # only used for current batch
+        self.task_count = 0  # tasks submitted by this downloader
         self.all_task_count = 0
         self.current_task_index = 0 # for all the total at end 
         self.pending_tasks = []
-        self.MAX_CONCURRENT_TASKS = 2000
-        self.TASK_CHECK_INTERVAL = 600  # 10 minutes in seconds
+        export_settings = config.get_export_settings()
+        self.MAX_CONCURRENT_TASKS = export_settings.get('max_in_flight_tasks', 2000)
+        self.TASK_CHECK_INTERVAL = export_settings.get('max_poll_interval', 600)  # 10 minutes in seconds
+        self.MIN_TASK_CHECK_INTERVAL = export_settings.get('min_poll_interval', 30)
         self.start_date = start_date
         self.end_date = end_date
-        self.source_type = source_type
+        self.profiler = None  # PhaseProfiler of the run, see enable_profiling
+        self.set_jobs(jobs or [SourceJob(source_type)])
         self.log_callback = log_callback
+        self.journal = journal or TaskJournal.new_run(export_settings.get('runs_dir', DEFAULT_RUNS_DIR),
+                                                      '+'.join(job.source_type for job in self.jobs))
+        self.done_keys = set()  # task keys already submitted or completed by a previous attempt
+        self.resumed = False
+        self.skip_existing = export_settings.get('skip_existing', False) if skip_existing is None else skip_existing
+        self.existing_exports: Dict[str, set] = {}  # file name prefixes already in each Drive folder
+        self._date_periods: Dict[Tuple[str, str, str], Tuple[Any, Any, List[Tuple[str, str]]]] = {}
+        self.plans: List[TaskPlan] = []  # task plan of every source, see build_plans
+        self.plan_order = plan_order or export_settings.get('plan_order', DATE_MAJOR)
+        self.priorities = priorities or {}
+        self._plan_dates = None
+
+        backend = backend or export_settings.get('backend', 'ee')
+        if isinstance(backend, str):
+            backends = [get_backend(backend, project=credential.project, **export_settings.get('backend_options', {}))
+                        for credential in self.credentials]
+        elif len(self.credentials) == 1:
+            backends = [backend]
+        else:
+            raise ValueError("Pass a backend name, not a backend instance, to export with several accounts")
+        # The first account also computes the export regions and builds the composites
+        self.backend = backends[0]
 
         self.region_calculator = RegionCalculator()
+        cache_dir = Path(export_settings.get('region_cache_dir', DEFAULT_CACHE_DIR))
+        if self.backend.name != 'ee':
+            # Keep simulated regions away from the real cache
+            cache_dir = cache_dir / self.backend.name
+        self.region_cache = RegionCache(
+            self.config.get_shared_assets_id(),
+            self.region_calculator.REGION_RULE_VERSION,
+            cache_dir
+        )
+        self.target_bounds = None  # bounding box of the export regions of all target indices
+        self.pack_regions = export_settings.get('pack_regions', False)
+        self.region_packer = RegionPacker(
+            tile_size_m=export_settings.get('pack_tile_size_m', 2000),
+            max_regions_per_tile=export_settings.get('pack_max_regions', 100)
+        )
+        self.tiles: Dict[str, RegionTile] = {}
+        self.unresolved_regions = set()  # indices with no feature in the shared asset
+        # Plan, resolve regions and build exports on worker threads while submitting, unless
+        # packing or composite materialization need every region before the first task
+        self.stream_plan = export_settings.get('stream_plan', True)
+        # Guards the region cache, filled by the pipelines of all accounts
+        self._region_lock = threading.Lock()
+        self._period_images: Dict[Tuple[str, Tuple[str, str]], Any] = {}
+        self.run_start = None
+        self.first_submit_seconds = None  # latency of the first submission of the last run
+        self.export_units = list(self.target_indices)  # indices and tile IDs, one task per unit and date range
+        self.composite_registry = CompositeRegistry(
+            self.backend,
+            asset_root=export_settings.get('composite_asset_root') if export_settings.get('materialize_composites', False) else None,
+            min_uses=export_settings.get('materialize_min_exports', 500),
+            registry_file=cache_dir / 'composites.json'
+        )
+        # One task tracker, submitter and scheduler per account, sharing the journal and the metrics
+        self.accounts = [self.create_account(number, credential, account_backend)
+                         for number, (credential, account_backend) in enumerate(zip(self.credentials, backends))]
+        first_account = self.accounts[0]
+        self.task_tracker = first_account.task_tracker
+        self.submitter = first_account.submitter
+        self.scheduler = first_account.scheduler
+        self.pipeline = first_account.pipeline
+        self.metrics = ExportMetrics()
+        self.metrics.set_gauge('tasks_in_flight', self.active_task_count)
+        self.metrics_port = export_settings.get('metrics_port')  # None disables the HTTP endpoint
+        # Retries of failed submissions and of tasks that ended FAILED on the server
+        self.retry_policy = RetryPolicy(
+            max_retries=export_settings.get('task_max_retries', 3),
+            base_delay=export_settings.get('task_retry_delay', 60),
+            max_delay=export_settings.get('task_max_retry_delay', 1800)
+        )
+        self.task_attempts: Dict[str, int] = {}  # task key -> retries so far
+        self.dead_letters: List[Dict[str, Any]] = []  # tasks that failed for good
+        # Guards the task counters, export tasks are submitted from several threads
+        self._task_lock = threading.Lock()
+        if export_settings.get('profile', False):
+            self.enable_profiling(export_settings.get('profile_cprofile', False),
+                                  export_settings.get('profile_tracemalloc', False))
 
         # Validate inputs
-        if not self.auth_file.exists():
-            raise FileNotFoundError(f"Auth file not found: {self.auth_file}")
+        for credential in self.credentials:
+            if not Path(credential.auth_file).exists() and self.backend.name == 'ee':
+                raise FileNotFoundError(f"Auth file not found: {credential.auth_file}")
         if not self.target_indices:
             raise ValueError("No target indices provided")
+        if self.plan_order not in PLAN_ORDERS:
+            raise ValueError(f"Unknown plan order '{self.plan_order}', expected one of {list(PLAN_ORDERS)}")
+        if self.plan_order == PRIORITY and not self.priorities:
+            raise ValueError("The 'priority' plan order needs the priorities of the target indices")
         
         self.all_task_count = self.calculate_total_tasks()
 
@@ -56,250 +179,902 @@ class TifDownloader:
        
 
 
+    def enable_profiling(self, use_cprofile: bool = False, use_tracemalloc: bool = False):
+        """
+        Time every phase of the next export run, written to profile.json in the run directory
+        Args:
+            use_cprofile: Also profile the export thread with cProfile
+            use_tracemalloc: Also trace memory allocations per phase
+        """
+        self.profiler = PhaseProfiler(use_cprofile=use_cprofile, use_tracemalloc=use_tracemalloc)
+        for account in self.accounts:
+            account.backend.profiler = self.profiler
+            account.task_tracker.profiler = self.profiler
+            account.submitter.profiler = self.profiler
+
+    def create_account(self, number: int, credential: Credential, backend) -> ExportAccount:
+        """Build the task tracker, submitter, scheduler and streaming pipeline of one account"""
+        export_settings = self.config.get_export_settings()
+        tracker = TaskTracker(
+            backend=backend,
+            min_interval=self.MIN_TASK_CHECK_INTERVAL,
+            max_interval=self.TASK_CHECK_INTERVAL,
+            finished_callback=lambda task: self.record_finished_task(task, account)
+        )
+        submitter = TaskSubmitter(
+            max_workers=export_settings.get('submit_workers', 8),
+            min_submit_interval=export_settings.get('min_submit_interval', 0.2),
+            max_retries=export_settings.get('submit_max_retries', 5),
+            retry_delay=export_settings.get('submit_retry_delay', 5)
+        )
+        scheduler = TaskScheduler(
+            tracker,
+            max_in_flight=self.MAX_CONCURRENT_TASKS,
+            log_callback=self.log_callback,
+            submitter=submitter,
+            failure_callback=lambda job, error: self.handle_submit_failure(job, error, account)
+        )
+        pipeline = ExportPipeline(
+            queue_size=export_settings.get('pipeline_queue_size', 1000),
+            region_batch_size=self.region_calculator.REGION_BATCH_SIZE
+        )
+        account = ExportAccount(number, credential, backend, tracker, submitter, scheduler, pipeline)
+        return account
+
+    def active_task_count(self) -> int:
+        """Tasks of this run holding a task slot, over all accounts"""
+        return sum(account.task_tracker.active_count() for account in self.accounts)
+
+    def task_summary(self) -> Dict[str, int]:
+        """Task state counts over all accounts"""
+        summary = Counter()
+        for account in self.accounts:
+            summary.update(account.task_tracker.summary())
+        return dict(summary)
+
+    def set_jobs(self, jobs: List[SourceJob]):
+        """
+        Set the sources exported by this run
+        Args:
+            jobs: Source jobs, at most one per source type
+        """
+        jobs = [job.resolve(self.config) for job in jobs]
+        source_types = [job.source_type for job in jobs]
+        if not jobs or len(set(source_types)) != len(source_types):
+            raise ValueError(f"Expected each image source once per run, got {source_types}")
+        self.jobs = jobs
+        # First job, kept for single-source callers
+        self.source_type = jobs[0].source_type
+        self.folder_name = jobs[0].folder_name
+
+    def get_job(self, source_type: str) -> SourceJob:
+        """Job of a source in this run, or the default job of the source"""
+        for job in self.jobs:
+            if job.source_type == source_type:
+                return job
+        return SourceJob(source_type).resolve(self.config)
+
+    @classmethod
+    def from_journal(cls, run_dir, log_callback=None, backend=None) -> 'TifDownloader':
+        """
+        Rebuild a downloader from the journal of an interrupted run
+        Args:
+            run_dir: Run directory containing the task journal
+            log_callback: Optional callback receiving log messages
+            backend: Earth Engine backend or backend name, defaults to export_settings.backend
+        Returns:
+            TifDownloader: Downloader that skips work already done, call resume() to finish the run
+        """
+        journal = TaskJournal(run_dir)
+        run_params, tasks = journal.load()
+        if run_params is None:
+            raise ValueError(f"No export run journal found in {run_dir}")
+
+        if 'jobs' in run_params:
+            jobs = [SourceJob.from_dict(job) for job in run_params['jobs']]
+        else:
+            # Journal of a single-source run
+            jobs = [SourceJob(run_params['source_type'], run_params['folder_name'])]
+
+        downloader = cls(
+            config=Config.load_from_yaml(io.StringIO(json.dumps(run_params['config']))),
+            auth_file=run_params['auth_file'],
+            target_indices=run_params['target_indices'],
+            start_date=run_params['start_date'],
+            end_date=run_params['end_date'],
+            source_type=jobs[0].source_type,
+            log_callback=log_callback,
+            journal=journal,
+            backend=backend,
+            jobs=jobs,
+            plan_order=run_params.get('plan_order', DATE_MAJOR),
+            priorities=dict(run_params.get('priorities') or []),
+            credentials=[Credential.from_dict(credential) for credential in run_params.get('credentials', [])] or None
+        )
+        downloader.restore_tasks(tasks)
+        return downloader
+
+    def restore_tasks(self, tasks):
+        """
+        Restore task progress from replayed journal entries
+        Completed and dead-lettered tasks are skipped, submitted tasks are tracked again by the account
+        that submitted them and skipped once the backend reports their state, failed and planned tasks are redone
+        """
+        in_flight = 0
+        for key, task in tasks.items():
+            if task['event'] == COMPLETED:
+                self.done_keys.add(key)
+            elif task['event'] == DEAD_LETTER:
+                self.done_keys.add(key)
+                self.dead_letters.append({name: task.get(name) for name in
+                                          ('key', 'stage', 'failure_class', 'error', 'attempts')})
+            elif task['event'] == SUBMITTED:
+                self.accounts[task.get('account', 0)].task_tracker.register(task['task_id'], key=key, restored=True)
+                in_flight += 1
+        self.current_task_index = len(self.done_keys)
+        self.resumed = True
+        self.log_message(f"Resuming run {self.journal.run_dir}: "
+                         f"{len(self.done_keys) - len(self.dead_letters)} tasks completed, "
+                         f"{in_flight} tasks in flight, {len(self.dead_letters)} dead letters")
+
+    def check_restored_tasks(self):
+        """
+        Poll the tasks restored as in flight before planning
+        Tasks the backend knows are skipped by the plan, tasks it reports as UNKNOWN are planned again
+        """
+        for account in self.accounts:
+            account.task_tracker.poll()
+        lost = 0
+        for account in self.accounts:
+            for task in list(account.task_tracker.tasks.values()):
+                if not task.get('restored'):
+                    continue
+                if task['state'] == 'UNKNOWN':
+                    # Not a task of this run anymore, kept out of the final task states
+                    account.task_tracker.forget(task['id'])
+                    lost += 1
+                else:
+                    self.done_keys.add(task['key'])
+                    self.current_task_index += 1
+        if lost:
+            self.log_message(f"{lost} tasks of the interrupted run are unknown to the backend, planning them again")
+
+    def resume(self):
+        """Finish the remaining work of a run rebuilt with from_journal"""
+        self.check_restored_tasks()
+        self.start_export(self.start_date, self.end_date)
+
+    def record_finished_task(self, task, account: Optional[ExportAccount] = None):
+        """Record a finished task in the journal and the metrics, retrying or dead-lettering failed tasks"""
+        source = (task.get('key') or '').split('|')[0]
+        # Tasks lost before a resume did not fail in this run, check_restored_tasks plans them again
+        lost_before_resume = (task.get('state') == 'UNKNOWN' and task.get('restored')
+                              and task.get('key') not in self.done_keys)
+        if task.get('state') == 'COMPLETED':
+            self.journal.record(COMPLETED, key=task.get('key'), task_id=task['id'])
+            self.metrics.inc('tasks_completed_total', source=source)
+        else:
+            self.journal.record(FAILED, key=task.get('key'), task_id=task['id'],
+                                state=task.get('state'), error=task.get('error_message'))
+            if not lost_before_resume:
+                self.metrics.inc('tasks_failed_total', source=source)
+            if task.get('key') and not lost_before_resume:
+                if task.get('state') in ('FAILED', 'UNKNOWN'):
+                    self.retry_or_dead_letter(task['key'], task.get('error_message'), 'task', account=account)
+                else:
+                    # Cancelled by hand, not retried
+                    self.add_dead_letter(task['key'], 'task', 'cancelled', task.get('state'))
+
+        # Queue wait and run time from the GEE task timestamps
+        created, started, updated = (task.get(f"{name}_timestamp_ms") for name in ('creation', 'start', 'update'))
+        if created is not None and started is not None:
+            self.metrics.observe('queue_wait_seconds', max(started - created, 0) / 1000, source=source)
+        if started is not None and updated is not None:
+            self.metrics.observe('run_seconds', max(updated - started, 0) / 1000, source=source)
+
+    def handle_submit_failure(self, job: Tuple, error: Exception, account: Optional[ExportAccount] = None) -> bool:
+        """Scheduler callback for a job whose submission failed, returns True if the job will be retried"""
+        index, _, date_range, source_type = job[:4]
+        return self.retry_or_dead_letter(task_key(source_type, index, date_range[0]), str(error), 'submit', job,
+                                         account)
+
+    def retry_or_dead_letter(self, key: str, error: Optional[str], stage: str, job: Optional[Tuple] = None,
+                             account: Optional[ExportAccount] = None) -> bool:
+        """
+        Queue a failed task for a retry with exponential backoff, or add it to the dead letters
+        Args:
+            key: Task key of the failed task
+            error: Submission error or error message of the failed task
+            stage: 'submit' for a failed submission, 'task' for a task that ended FAILED
+            job: Job of the task, rebuilt from the key if not provided
+            account: Account that submitted the task and resubmits it, defaults to the first account
+        Returns:
+            bool: True if the task was queued for a retry
+        """
+        failure_class = classify_failure(error)
+        attempt = self.task_attempts.get(key, 0)
+        if self.retry_policy.should_retry(failure_class, attempt):
+            job = job or self.job_for_key(key)
+            if job is not None:
+                self.task_attempts[key] = attempt + 1
+                delay = self.retry_policy.delay(attempt)
+                (account or self.accounts[0]).scheduler.retry(job, delay)
+                self.metrics.inc('tasks_retried_total', source=key.split('|')[0], failure_class=failure_class)
+                self.log_message(f"Retrying {key} in {delay:.0f} seconds after {failure_class} {stage} failure "
+                                 f"(retry {attempt + 1}): {error}")
+                return True
+
+        self.add_dead_letter(key, stage, failure_class, error, attempt)
+        return False
+
+    def add_dead_letter(self, key: str, stage: str, failure_class: str, error: Optional[str], attempts: int = 0):
+        """Give up on a task, recording it in the journal and the dead letters of the run"""
+        entry = {'key': key, 'stage': stage, 'failure_class': failure_class, 'error': error, 'attempts': attempts}
+        self.dead_letters.append(entry)
+        self.journal.record(DEAD_LETTER, **entry)
+        self.metrics.inc('dead_letters_total', source=key.split('|')[0], failure_class=failure_class)
+        self.log_message(f"Giving up on {key} after {attempts} retries, {failure_class} failure: {error}")
+
+    def job_for_key(self, key: str) -> Optional[Tuple]:
+        """Rebuild the (index, image, date_range, source_type, folder_name, scale) job of a task key"""
+        source_type, index, start_date = key.split('|')
+        index = next((unit for unit in self.export_units if str(unit) == index), None)
+        job = next((job for job in self.jobs if job.source_type == source_type), None)
+        if index is None or job is None:
+            return None
+        date_range = next((date_range for date_range in
+                           self.get_date_ranges(self.start_date, self.end_date, source_type, job.cadence)
+                           if date_range[0] == start_date), None)
+        if date_range is None:
+            return None
+        return (index, self.get_image_collection(date_range, source_type), date_range,
+                source_type, job.folder_name, job.scale)
+
     def calculate_total_tasks(self):
-        """Calculate total tasks based on date ranges and target indices"""
-        date_ranges = self.get_date_ranges(self.start_date, self.end_date, self.source_type)
+        """Calculate total tasks based on date ranges of every source and target indices"""
+        date_range_count = sum(len(self.get_date_ranges(self.start_date, self.end_date, job.source_type, job.cadence))
+                               for job in self.jobs)
 
-        return len(date_ranges) * len(self.target_indices)
+        return date_range_count * len(self.export_units)
 
     def initialize_ee(self):
-        """Initialize Earth Engine with credentials"""
-        try:
-            credentials = get_credentials(self.auth_file)
-            ee.Initialize(credentials)
-            print("Earth Engine initialized successfully")
-        except Exception as e:
-            raise RuntimeError(f"Failed to initialize Earth Engine: {str(e)}")
+        """Initialize Earth Engine with the credential of every account"""
+        for account in self.accounts:
+            try:
+                account.backend.initialize(account.credential.auth_file)
+            except Exception as e:
+                if len(self.accounts) > 1:
+                    raise RuntimeError(f"Failed to initialize Earth Engine for {account.name}: {str(e)}")
+                raise RuntimeError(f"Failed to initialize Earth Engine: {str(e)}")
 
-    def get_date_ranges(self, start_date: str, end_date: str, source_type: str) -> List[Tuple[str, str]]:
+    def date_periods(self, start_date: str, end_date: str, cadence: str):
+        """
+        Date periods of a cadence, generated once per run
+        Returns:
+            Tuple of (start dates, end dates) datetime64 arrays and the list of (start_date, end_date) strings
+        """
+        key = (start_date, end_date, cadence)
+        if key not in self._date_periods:
+            with profile_phase(self.profiler, 'date_ranges'):
+                starts, ends = date_periods(start_date, end_date, cadence)
+                date_ranges = list(zip(np.datetime_as_string(starts, unit='D').tolist(),
+                                       np.datetime_as_string(ends, unit='D').tolist()))
+            self._date_periods[key] = (starts, ends, date_ranges)
+        return self._date_periods[key]
+
+    def get_date_ranges(self, start_date: str, end_date: str, source_type: str,
+                        cadence: Optional[str] = None) -> List[Tuple[str, str]]:
         """
         Get list of date ranges based on source type
         Args:
             start_date: Start date in YYYY-MM-DD format
             end_date: End date in YYYY-MM-DD format
             source_type: Type of imagery (nicfi/sentinel)
+            cadence: 'monthly' or 'dekadal', defaults to the cadence of the source
         Returns:
             List of (start_date, end_date) tuples
         """
-        try:
-            start = datetime.strptime(start_date, "%Y-%m-%d")
-            end = datetime.strptime(end_date, "%Y-%m-%d")
-        except ValueError as e:
-            raise ValueError(f"Invalid date format. Use YYYY-MM-DD: {str(e)}")
-
-        dates = []
-        if source_type.lower() == 'nicfi':
-            # One image per month for NICFI
-            current = start.replace(day=1)
-            while current < end:
-                next_month = (current + timedelta(days=32)).replace(day=1)
-                dates.append((current.strftime("%Y-%m-%d"), next_month.strftime("%Y-%m-%d")))
-                current = next_month
-        else:
-            # Three images per month for Sentinel
-            current = start
-            while current < end:
-                month_end = current.replace(day=28) + timedelta(days=4)
-                month_end = month_end.replace(day=1) - timedelta(days=1)
-                
-                # Split month into three periods
-                dates.extend([
-                    (current.strftime("%Y-%m-%d"), 
-                     (current.replace(day=10)).strftime("%Y-%m-%d")),
-                    (current.replace(day=11).strftime("%Y-%m-%d"), 
-                     (current.replace(day=20)).strftime("%Y-%m-%d")),
-                    (current.replace(day=21).strftime("%Y-%m-%d"), 
-                     month_end.strftime("%Y-%m-%d"))
-                ])
-                current = (month_end + timedelta(days=1))
-
-        return dates
-
-    def get_image_collection(self, date_range: Tuple[str, str], source_type: str) -> ee.ImageCollection:
+        return self.date_periods(start_date, end_date, cadence or self.get_job(source_type).cadence)[2]
+
+    def get_image_collection(self, date_range: Tuple[str, str], source_type: str) -> Any:
         """
         Get image collection for specified date range and source
         Args:
             date_range: (start_date, end_date) tuple
             source_type: Type of imagery (nicfi/sentinel)
         Returns:
-            ee.ImageCollection: Filtered image collection
+            Backend handle of the median image of the filtered collection, read from its
+            materialized asset when one covers the target regions
         """
         start_date, end_date = date_range
         collection_id = self.config.get_project_path(source_type)
         
-        return (ee.ImageCollection(collection_id)
-                .filterDate(start_date, end_date)
-                .median())
+        with profile_phase(self.profiler, 'collection_build'):
+            return self.composite_registry.get(collection_id, start_date, end_date, 'median',
+                                               region=self.target_bounds, scale=self.get_job(source_type).scale)
+
+    def prepare_composites(self, start_date: str, end_date: str):
+        """Materialize the composites read by at least materialize_min_exports exports as assets"""
+        self.composite_registry.load()
+        if self.composite_registry.asset_root is None or self.target_bounds is None:
+            return
+
+        started = 0
+        for plan in self.get_plans(start_date, end_date):
+            job = plan.job
+            collection_id = self.config.get_project_path(job.source_type)
+            for date_range, uses in zip(plan.date_ranges, plan.row_counts().tolist()):
+                if self.composite_registry.materialize(collection_id, date_range[0], date_range[1], 'median',
+                                                       self.target_bounds, job.scale, uses):
+                    started += 1
+        if started:
+            self.log_message(f"Materializing {started} composites as assets under {self.composite_registry.asset_root}")
+
+    def _compute_export_regions(self, indices: List[int]) -> Tuple[int, List[int]]:
+        """
+        Compute export regions on the backend in batches and store them in the region cache
+        Returns:
+            Tuple of (number of regions found, indices of the batches that failed)
+        """
+        asset_id = self.config.get_shared_assets_id()
+        batch_size = self.region_calculator.REGION_BATCH_SIZE
+        found, failed = 0, []
+        for start in range(0, len(indices), batch_size):
+            batch = indices[start:start + batch_size]
+            try:
+                regions = self.backend.compute_regions(asset_id, batch, self.region_calculator)
+            except Exception as e:
+                self.log_message(f"Error calculating export regions for {len(batch)} indices: {str(e)}")
+                failed.extend(batch)
+                continue
+            for index, (geometry, shape_size) in regions.items():
+                self.region_cache.put(index, geometry, shape_size)
+            found += len(regions)
+        return found, failed
+
+    def load_region_cache(self):
+        """Load the export regions cached by earlier runs of the shared asset"""
+        asset_id = self.config.get_shared_assets_id()
+        if self.region_cache.load(self.backend.get_asset_version(asset_id)):
+            self.log_message(f"Loaded {len(self.region_cache)} cached export regions")
+
+    def prepare_regions(self):
+        """Fill the region cache for all target indices, once per run"""
+        self.load_region_cache()
+
+        missing = [index for index in self.target_indices if index not in self.region_cache]
+        if missing:
+            self.log_message(f"Calculating export regions for {len(missing)} indices...")
+            found, failed = self._compute_export_regions(missing)
+            self.region_cache.save()
+
+            not_found = len(missing) - found - len(failed)
+            if not_found:
+                self.log_message(f"No export region found for {not_found} indices")
+            if failed:
+                self.log_message(f"Export regions of {len(failed)} indices failed, calculated again per task")
+
+        # Area the composites are read in, materialized composites must cover it
+        self.target_bounds = bounding_box(self.region_cache.get(index)[0] for index in self.target_indices
+                                          if index in self.region_cache)
+
+    def pack_export_regions(self):
+        """Cluster nearby tiny and small export regions into tiles, exported as one task per tile and date range"""
+        if not self.pack_regions:
+            return
+
+        packable = {}
+        for index in self.target_indices:
+            region = self.region_cache.get(index) if index in self.region_cache else None
+            if region is not None and region[1] < self.region_calculator.SMALL_AREA_THRESHOLD:
+                packable[index] = region[0]
+
+        tiles, _ = self.region_packer.pack(packable)
+        packed = {index for tile in tiles for index in tile.indices}
+        self.tiles = {tile.tile_id: tile for tile in tiles}
+        self.export_units = [index for index in self.target_indices if index not in packed] + list(self.tiles)
+
+        # Sidecar files mapping every packed index to its pixel window, per source scale
+        for job in self.jobs:
+            write_tile_index(self.journal.run_dir / f"tiles_{job.source_type}.json", tiles, packable,
+                             job.scale, job.source_type)
+        self.log_message(f"Packed {len(packed)} regions into {len(tiles)} tiles, "
+                         f"{len(self.export_units)} exports per date range")
+
+    def get_export_region(self, index) -> Tuple[Dict[str, Any], float]:
+        """
+        Get export region for an index or tile ID from the region cache
+        Args:
+            index: Shape index or tile ID
+        Returns:
+            Tuple of (export region GeoJSON, shape_size_ha)
+        """
+        if index in self.tiles:
+            tile = self.tiles[index]
+            return tile.geometry, sum(self.region_cache.get(member)[1] for member in tile.indices)
+        if index not in self.region_cache:
+            if index not in self.unresolved_regions:
+                # Backend errors are raised, the task is retried like any other transient failure
+                regions = self.backend.compute_regions(self.config.get_shared_assets_id(), [index],
+                                                       self.region_calculator)
+                for found_index, (geometry, shape_size) in regions.items():
+                    self.region_cache.put(found_index, geometry, shape_size)
+                if index not in self.region_cache:
+                    self.unresolved_regions.add(index)
+            if index not in self.region_cache:
+                raise ValueError(f"Index {index} not found in shared asset")
+        return self.region_cache.get(index)
+
+    @staticmethod
+    def export_date_str(start_date: str, source_type: str) -> str:
+        """'2023-01' for NICFI or '20230101' for Sentinel"""
+        return start_date[:7] if source_type.lower() == 'nicfi' else start_date.replace('-', '')
+
+    @classmethod
+    def export_file_prefix(cls, index, start_date: str, source_type: str) -> str:
+        """File name prefix of the GeoTIFF exported for an index and date range"""
+        return f"{index}-{cls.export_date_str(start_date, source_type)}-{source_type}"
+
+    def load_existing_exports(self, folder_name: str):
+        """List a destination Drive folder once and remember the files already exported"""
+        self.log_message(f"Listing existing exports in Drive folder {folder_name}...")
+        try:
+            self.existing_exports[folder_name] = return_folder_file_prefixes(str(self.auth_file), folder_name)
+            self.log_message(f"Found {len(self.existing_exports[folder_name])} existing exports in {folder_name}")
+        except Exception as e:
+            self.existing_exports[folder_name] = set()
+            self.log_message(f"Failed to list existing exports, exporting all tasks: {str(e)}")
 
-    def create_export_task(self, index: int, image: ee.Image, date_range: Tuple[str, str], 
-                          source_type: str, folder_name: str):
+    def create_export_task(self, index: int, image: Any, date_range: Tuple[str, str], 
+                          source_type: str, folder_name: str, scale: Optional[int] = None,
+                          account: Optional[ExportAccount] = None):
         """
         Create and submit an export task
         Args:
-            index: Shape index
-            image: Earth Engine image to export
+            index: Shape index or tile ID
+            image: Backend handle of the image to export
             date_range: (start_date, end_date) tuple
             source_type: Type of imagery
             folder_name: Google Drive folder name
+            scale: Export scale in meters, defaults to the scale of the source
+            account: Account submitting the task, defaults to the first account
         """
         start_date, end_date = date_range
+        key = task_key(source_type, index, start_date)
+        account = account or self.accounts[0]
         
         try:
-            # Get feature from shared asset
-            feature = (ee.FeatureCollection(self.config.get_shared_assets_id())
-                      .filter(ee.Filter.eq('Index', index))
-                      .first())
-            
-
-            export_region,export_size_ha = self.region_calculator.get_export_region(feature)
+            # Get export region from the region cache
+            with profile_phase(self.profiler, 'feature_lookup'):
+                export_region, export_size_ha = self.get_export_region(index)
             print(f"export_region size: {export_size_ha}")
 
             # Set export parameters based on source type
-            scale = 5 if source_type.lower() == 'nicfi' else 10
-            # '2023-01' for NICFI or '20230101' for Sentinel
-            date_str = start_date[:7] if source_type.lower() == 'nicfi' else start_date.replace('-', '')
-            # Create export task
-            task = ee.batch.Export.image.toDrive(
-                image=image.clip(export_region),
+            scale = scale or self.get_job(source_type).scale
+            date_str = self.export_date_str(start_date, source_type)
+            # Create and start export task
+            submit_start = time.perf_counter()
+            task_id = account.backend.start_export(
+                image=image,
+                region=export_region,
                 description=f"export_{index}_{date_str}",
                 folder=folder_name,
+                file_name_prefix=self.export_file_prefix(index, start_date, source_type),
                 scale=scale,
-                region=export_region,
                 crs='EPSG:4326',
-                maxPixels=1e13,
-                fileNamePrefix=f"{index}-{date_str}-{source_type}"
+                max_pixels=1e13
             )
+            self.metrics.observe('submit_latency_seconds', time.perf_counter() - submit_start, source=source_type)
+            self.metrics.inc('tasks_submitted_total', source=source_type)
 
-            # Start the task
-            task.start()
-            self.current_task_index += 1
-
-
+            self.journal.record(SUBMITTED, key=key, task_id=task_id, account=account.number)
 
-            self.task_count += 1
-            self.pending_tasks.append(task)
+            with self._task_lock:
+                self.current_task_index += 1
+                self.task_count += 1
+                self.pending_tasks.append(task_id)
+                account.task_tracker.register(task_id, key=key, index=index, date_range=date_range)
+                current_task_index = self.current_task_index
+                first_submit = self.first_submit_seconds is None and self.run_start is not None
+                if first_submit:
+                    self.first_submit_seconds = time.monotonic() - self.run_start
 
-            self.log_message(f"Task submitted - Total: {self.all_task_count}, Current: {self.current_task_index}, Index: {index}, Date: {start_date} to {end_date}, Source: {source_type}, Folder: {folder_name}, ID: {task.id}")
+            if first_submit:
+                self.log_message(f"First task submitted {self.first_submit_seconds:.1f} seconds after the run started")
+            self.log_message(f"Task submitted - Total: {self.all_task_count}, Current: {current_task_index}, Index: {index}, Date: {start_date} to {end_date}, Source: {source_type}, Folder: {folder_name}, ID: {task_id}")
 
         except Exception as e:
+            self.metrics.inc('submit_errors_total', source=source_type)
             print(f"Error creating task for index {index}: {str(e)}")
             raise
 
-    def is_ee_task_list_clear(self):
-        """Check if GEE task list is clear for new submissions"""
+    def monitor_tasks(self):
+        """Monitor the GEE tasks of this run and wait until all of them have finished"""
+        for account in self.accounts:
+            account.scheduler.wait_until_done()
+        print(f"\nGEE task states: {self.task_summary()}")
+
+    def finished_tasks(self, plan: TaskPlan):
+        """Yield (start_date, unit) of the tasks of a plan done by a previous attempt or already in the Drive folder"""
+        source_type = plan.job.source_type
+        for key in self.done_keys:
+            key_source, index, start_date = key.split('|')
+            if key_source == source_type:
+                yield start_date, index
+
+        existing_exports = self.existing_exports.get(plan.job.folder_name, set())
+        if existing_exports and plan.date_ranges:
+            # Prefixes are <index>-<date>-<source>, NICFI dates contain a dash so split by the date width
+            starts = {self.export_date_str(start_date, source_type): start_date for start_date, _ in plan.date_ranges}
+            date_width = len(next(iter(starts)))
+            suffix = f"-{source_type}"
+            for prefix in existing_exports:
+                if not prefix.endswith(suffix):
+                    continue
+                rest = prefix[:-len(suffix)]
+                date_str = rest[-date_width:]
+                if date_str in starts and rest[-date_width - 1:-date_width] == '-':
+                    yield starts[date_str], rest[:-date_width - 1]
+
+    def build_plans(self, start_date: str, end_date: str) -> List[TaskPlan]:
+        """
+        Plan the tasks of every source, without the tasks already done
+        Returns:
+            List of task plans, one per job
+        """
+        self.plans = []
+        for job in self.jobs:
+            starts, ends, _ = self.date_periods(start_date, end_date, job.cadence)
+            plan = TaskPlan(job, self.export_units, starts, ends)
+            self.plans.append(plan.exclude(self.finished_tasks(plan)))
+        self._plan_dates = (start_date, end_date)
+        return self.plans
+
+    def get_plans(self, start_date: str, end_date: str, account: Optional[ExportAccount] = None) -> List[TaskPlan]:
+        """
+        Task plans of the run, built on first use
+        Args:
+            start_date: Start date in YYYY-MM-DD format
+            end_date: End date in YYYY-MM-DD format
+            account: Return the shard of this account when the run uses several accounts,
+                every account exports all periods of its share of the export units
+        """
+        if self._plan_dates != (start_date, end_date):
+            self.build_plans(start_date, end_date)
+        if account is None or len(self.accounts) == 1:
+            return self.plans
+        return [plan.shard(account.number, len(self.accounts)) for plan in self.plans]
+
+    def unit_columns(self, units: List[Any]) -> Optional[np.ndarray]:
+        """Positions of export units in priority order, None to keep the target list order"""
+        if self.plan_order != PRIORITY:
+            return None
+
+        def priority(unit) -> float:
+            if unit in self.tiles:
+                # A tile is as urgent as its most urgent region
+                return min(self.priorities.get(index, np.inf) for index in self.tiles[unit].indices)
+            return self.priorities.get(unit, np.inf)
+
+        return np.argsort(np.array([priority(unit) for unit in units], dtype=float), kind='stable')
+
+    def iter_date_major(self, plans: List[TaskPlan]):
+        """
+        Yield (index, date_range, job) tasks period by period
+        Sources are interleaved task by task, so they share the task slots and the same index
+        of every source is submitted together
+        """
+        plans = deque((plan.job, iter(plan)) for plan in plans)
+        while plans:
+            job, tasks = plans.popleft()
+            task = next(tasks, None)
+            if task is None:
+                continue
+            index, date_range = task
+            yield index, date_range, job
+            plans.append((job, tasks))
+
+    def iter_index_major(self, plans: List[TaskPlan]):
+        """
+        Yield (index, date_range, job) tasks unit by unit, every period of every source of a unit
+        before the next unit, so the time series of a unit is complete as early as possible
+        """
+        # All plans hold the same export units, walked in the same order
+        columns = self.unit_columns(plans[0].units) if plans else None
+        units = zip(*(plan.iter_units(columns) for plan in plans))
+        for unit_tasks in units:
+            for plan, (index, date_ranges) in zip(plans, unit_tasks):
+                for date_range in date_ranges:
+                    yield index, date_range, plan.job
+
+    def iter_plan_tasks(self, start_date: str, end_date: str, account: Optional[ExportAccount] = None):
+        """
+        Lazily yield (index, date_range, job) tasks of all sources, in the plan order of the run
+        Args:
+            start_date: Start date in YYYY-MM-DD format
+            end_date: End date in YYYY-MM-DD format
+            account: Only yield the tasks of this account's shard, see get_plans
+        """
+        plans = self.get_plans(start_date, end_date, account)
+        tasks = self.iter_date_major(plans) if self.plan_order == DATE_MAJOR else self.iter_index_major(plans)
+        for index, date_range, job in tasks:
+            self.journal.record(PLANNED, key=task_key(job.source_type, index, date_range[0]))
+            yield index, date_range, job
+
+    def build_export_job(self, task: Tuple) -> Tuple:
+        """
+        Turn a planned task into an (index, image, date_range, source_type, folder_name, scale) job
+        The image of a source and date range is built once and shared by all its tasks
+        """
+        index, date_range, job = task
+        image_key = (job.source_type, date_range)
+        image = self._period_images.get(image_key)
+        if image is None:
+            image = self._period_images[image_key] = self.get_image_collection(date_range, job.source_type)
+        return index, image, date_range, job.source_type, job.folder_name, job.scale
+
+    def resolve_regions(self, tasks: List[Tuple]):
+        """Compute the export regions of a batch of planned tasks that are not in the region cache yet"""
+        with self._region_lock:
+            missing = sorted({index for index, _, _ in tasks
+                              if index not in self.tiles and index not in self.unresolved_regions
+                              and index not in self.region_cache})
+            if not missing:
+                return
+            with profile_phase(self.profiler, 'region_calculation'):
+                found, failed = self._compute_export_regions(missing)
+            if found + len(failed) < len(missing):
+                # Not in the shared asset, their tasks fail without asking the backend again. Indices of
+                # failed batches are calculated again when their tasks are built
+                failed = set(failed)
+                self.unresolved_regions.update(index for index in missing
+                                               if index not in self.region_cache and index not in failed)
+
+    def iter_plan(self, start_date: str, end_date: str, account: Optional[ExportAccount] = None):
+        """
+        Lazily yield (index, image, date_range, source_type, folder_name, scale) jobs of all sources
+        on the calling thread, see iter_plan_tasks for the order
+        Args:
+            start_date: Start date in YYYY-MM-DD format
+            end_date: End date in YYYY-MM-DD format
+            account: Only yield the jobs of this account's shard, see get_plans
+        """
+        for task in self.iter_plan_tasks(start_date, end_date, account):
+            yield self.build_export_job(task)
+
+    def iter_streamed_plan(self, start_date: str, end_date: str, account: Optional[ExportAccount] = None):
+        """
+        Yield the jobs of iter_plan from the streaming pipeline of an account, planning, resolving
+        export regions in batches and building exports on worker threads while the scheduler submits
+        """
+        pipeline = (account or self.accounts[0]).pipeline
         try:
-            tasks = ee.batch.Task.list()
-            active_tasks = [task for task in tasks if task.state in ['READY', 'RUNNING']]
-            print(f"\nCurrent active GEE tasks: {len(active_tasks)}")
-            return len(active_tasks) == 0  # there is no active task and no running task 
-        except Exception as e:
-            print(f"Error checking GEE task list: {str(e)}")
-            return False
-        
+            yield from pipeline.run(self.iter_plan_tasks(start_date, end_date, account),
+                                    self.resolve_regions, self.build_export_job,
+                                    region_key=lambda task: task[0])
+        finally:
+            pipeline.stop()
+            for stage, stats in pipeline.stats().items():
+                self.metrics.inc('pipeline_items_total', stats['count'], stage=stage)
+            with self._region_lock:
+                self.region_cache.save()
 
-    def monitor_tasks(self):
-        """Monitor GEE tasks and wait until task list is clear"""
-        # Explain how this function works
-        # Check if GEE task list is clear
-        # If not, wait for 10 minutes and check again   
-        # Repeat until GEE task list is clear
-        while not self.is_ee_task_list_clear():
-            # print the time now 
-            print(f"\n{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-            self.log_message(f"\nWaiting {self.TASK_CHECK_INTERVAL/60:.1f} minutes before checking GEE task status...")
-            time.sleep(self.TASK_CHECK_INTERVAL)
-            
-            try:
-                tasks = ee.batch.Task.list()
-                active_tasks = [task for task in tasks if task.state in ['READY', 'RUNNING']]
-                
-                print(f"""
-GEE Task Status:
-- Active Tasks: {len(active_tasks)}
-- Maximum Allowed: {self.MAX_CONCURRENT_TASKS}
-- Space Available: {self.MAX_CONCURRENT_TASKS - len(active_tasks)}
-                """)
-                
-            except Exception as e:
-                print(f"Error monitoring tasks: {str(e)}")
-        
-        print("\nGEE task list is clear for new submissions")
+    def submit_account(self, account: ExportAccount, start_date: str, end_date: str, streaming: bool):
+        """Submit the tasks of an account's shard and wait until they have finished"""
+        jobs = (self.iter_streamed_plan(start_date, end_date, account) if streaming
+                else self.iter_plan(start_date, end_date, account))
+        account.scheduler.run(jobs, lambda job: self.create_export_task(*job, account=account))
 
-    def start_export(self, start_date: str, end_date: str, source_type: str, folder_name: str):
-        """Start the export process with batch task submission"""
+        # Wait for the remaining tasks to complete
+        if len(self.accounts) > 1:
+            print(f"Waiting for the final tasks of {account.name} to complete...")
+        else:
+            print("Waiting for final tasks to complete...")
+        account.scheduler.wait_until_done()
+
+    def submit_all(self, start_date: str, end_date: str, streaming: bool):
+        """Submit the tasks of every account, one scheduler per account running side by side"""
+        if len(self.accounts) == 1:
+            self.submit_account(self.accounts[0], start_date, end_date, streaming)
+        else:
+            with ThreadPoolExecutor(max_workers=len(self.accounts), thread_name_prefix='account') as executor:
+                futures = [executor.submit(self.submit_account, account, start_date, end_date, streaming)
+                           for account in self.accounts]
+            # Every account has finished, raise the first failure
+            for future in futures:
+                future.result()
+        print(f"\nGEE task states: {self.task_summary()}")
+
+    def start_export(self, start_date: str, end_date: str, source_type: Optional[str] = None,
+                     folder_name: Optional[str] = None):
+        """
+        Start the export process with sliding-window task submission
+        Args:
+            start_date: Start date in YYYY-MM-DD format
+            end_date: End date in YYYY-MM-DD format
+            source_type: Export only this source to folder_name, defaults to the jobs of the downloader
+            folder_name: Google Drive folder name of source_type
+        """
 
         # How it works:
-        # First Check if task list is clear
-        # Get all date ranges to process
-        # Get image collection for each date range
-        # Get feature from shared asset
-        # Create export task for each image collection
+        # Record the run parameters in the task journal so the run can be resumed
+        # Calculate export regions once for all sources, reusing the region cache from earlier runs,
+        # up front when packing or materializing composites, else streamed in batches while submitting
+        # List each Drive folder once when skipping existing exports
+        # Optionally pack nearby small regions into shared tiles
+        # Plan the remaining (index, date range) tasks of each source as a compact task plan
+        # Optionally materialize composites reused by many exports as assets
+        # Interleave the export tasks of all sources in one plan, date-major, index-major or by priority
+        # Stream planning, region lookup and export building through bounded queues
+        # Get image collection for each source and date range
+        # Shard the plan by export unit over the accounts, one scheduler per account
+        # Create export task for each index while free task slots are available
+        # Top up the task list whenever running tasks complete
+        # Retry failed submissions and FAILED tasks with backoff, dead-letter permanent failures
         # Monitor GEE tasks and wait until task list is clear
-        # Repeat until all date ranges are processed
 
+        if source_type is not None:
+            self.set_jobs([SourceJob(source_type, folder_name)])
+        self.start_date, self.end_date = start_date, end_date
+        self.all_task_count = self.calculate_total_tasks()
+
+        sources = '\n'.join(f"  - {job.source_type}: {job.cadence}, {job.scale} m, folder {job.folder_name}"
+                            for job in self.jobs)
         print(f"""
 Starting Export Process:
-- Source Type: {source_type}
+- Sources:
+{sources}
 - Date Range: {start_date} to {end_date}
 - Target Indices: {len(self.target_indices)}
-- Save Folder: {folder_name}
+- Total Tasks: {self.all_task_count}
+- Task Order: {self.plan_order}
+- Accounts: {len(self.accounts)}
+- Max In-Flight Tasks: {self.MAX_CONCURRENT_TASKS} per account
     """)
 
+        run_start = self.run_start = time.monotonic()
+        self.first_submit_seconds = None
+        metrics_server = self.start_metrics_server()
+        if self.profiler is not None:
+            self.profiler.start()
+        try:
+            if not self.resumed:
+                self.journal.record_run(
+                    auth_file=str(self.auth_file),
+                    config=self.config.get_config(),
+                    target_indices=self.target_indices,
+                    start_date=start_date,
+                    end_date=end_date,
+                    jobs=[job.to_dict() for job in self.jobs],
+                    credentials=[credential.to_dict() for credential in self.credentials],
+                    plan_order=self.plan_order,
+                    # Pairs, JSON object keys would turn the indices into strings
+                    priorities=list(self.priorities.items())
+                )
+            self.log_message(f"Task journal: {self.journal.journal_file}")
 
-        # First Check if task list is clear
-        self.monitor_tasks()
+            # Calculate export regions once for all sources and date ranges
+            streaming = self.stream_plan and not self.pack_regions and self.composite_registry.asset_root is None
+            with profile_phase(self.profiler, 'region_calculation'):
+                if streaming:
+                    self.load_region_cache()
+                else:
+                    self.prepare_regions()
+            if self.pack_regions:
+                self.pack_export_regions()
+                self.all_task_count = self.calculate_total_tasks()
 
-        try:
             # Get all date ranges to process
-            date_ranges = self.get_date_ranges(start_date, end_date, source_type)
-            print(f"Generated {len(date_ranges)} date ranges to process")
-
-            batch_count = 0
-            for date_range in date_ranges:
-                # Get image collection for this date range
-                collection = self.get_image_collection(date_range, source_type)
-
-                for index in self.target_indices:
-                    try:
-                        # Check if we've hit the batch limit
-                        if self.task_count >= self.MAX_CONCURRENT_TASKS:
-                            batch_count += 1
-                            print(f"\nBatch {batch_count} completed ({self.task_count} tasks)")
-                            print("Waiting for tasks to complete before starting next batch...")
-                            self.monitor_tasks()
-                            self.task_count = 0  # Reset counter for next batch
-                            self.pending_tasks = []  # Clear pending tasks list
-
-                        # Create and submit task
-                        self.create_export_task(index, collection, date_range, source_type, folder_name)
-
-                    except Exception as e:
-                        print(f"Error processing index {index}: {str(e)}")
-                        continue
-
-            # Wait for final batch to complete
-            if self.task_count > 0:
-                batch_count += 1
-                print(f"\nFinal batch {batch_count} submitted ({self.task_count} tasks)")
-                print("Waiting for final tasks to complete...")
-                self.monitor_tasks()
+            date_range_counts = {job.source_type: len(self.get_date_ranges(start_date, end_date, job.source_type, job.cadence))
+                                 for job in self.jobs}
+            print(f"Generated date ranges to process: {date_range_counts}")
 
+            if self.skip_existing:
+                for folder_name in dict.fromkeys(job.folder_name for job in self.jobs):
+                    self.load_existing_exports(folder_name)
+
+            # Plan the remaining tasks of every source once
+            plans = self.build_plans(start_date, end_date)
+            self.log_message(f"Task plan: {sum(map(len, plans))} tasks to submit, "
+                             f"{sum(plan.nbytes for plan in plans) / 1024 / 1024:.1f} MB")
+
+            # Precompute composites reused by many exports, for later date ranges and runs
+            self.prepare_composites(start_date, end_date)
+
+            self.submit_all(start_date, end_date, streaming)
+
+            account_counts = ''
+            if len(self.accounts) > 1:
+                account_counts = '\n' + '\n'.join(f"  - {account.name}: {account.scheduler.submitted_count} tasks"
+                                                  for account in self.accounts)
             self.log_message(f"""
 Export Process Summary:
-- Total Batches: {batch_count}
-- Total Date Ranges: {len(date_ranges)}
+- Total Date Ranges: {sum(date_range_counts.values())} {date_range_counts}
 - Total Indices: {len(self.target_indices)}
-- Total Tasks Created: {self.current_task_index}
+- Packed Tiles: {len(self.tiles)}
+- Total Tasks Created: {self.current_task_index}{account_counts}
+- Retried Tasks: {sum(self.task_attempts.values())}
+- Dead Letters: {len(self.dead_letters)}
             """)
 
         except Exception as e:
             self.log_message(f"Error during export process: {str(e)}")
             raise
+        finally:
+            if self.profiler is not None:
+                self.write_profile()
+            self.write_metrics_summary(time.monotonic() - run_start)
+            self.write_dead_letters()
+            if metrics_server is not None:
+                metrics_server.stop()
+            self.journal.close()
+
+    def write_profile(self):
+        """Stop the profiler and write the per-phase breakdown of the run"""
+        self.profiler.stop()
+        try:
+            report_file = self.profiler.write_report(self.journal.run_dir)
+            self.log_message(f"{self.profiler.format_breakdown()}\nProfile written to {report_file}")
+        except OSError as e:
+            self.log_message(f"Failed to write profile: {str(e)}")
+
+    def start_metrics_server(self) -> Optional[MetricsServer]:
+        """Serve the metrics on http://127.0.0.1:<metrics_port>/metrics if a port is configured"""
+        if self.metrics_port is None:
+            return None
+        try:
+            server = MetricsServer(self.metrics, int(self.metrics_port))
+            server.start()
+            self.log_message(f"Metrics: http://{server.host}:{server.port}/metrics")
+            return server
+        except (OSError, ValueError) as e:
+            self.log_message(f"Failed to start metrics endpoint: {str(e)}")
+            return None
+
+    def write_dead_letters(self):
+        """Write the tasks that failed for good to dead_letters.json in the run directory"""
+        if not self.dead_letters:
+            return
+        dead_letters_file = self.journal.run_dir / 'dead_letters.json'
+        try:
+            with open(dead_letters_file, 'w') as f:
+                json.dump(self.dead_letters, f, indent=2, default=str)
+            self.log_message(f"{len(self.dead_letters)} tasks failed for good, listed in {dead_letters_file}")
+        except OSError as e:
+            self.log_message(f"Failed to write dead letters: {str(e)}")
+
+    @property
+    def metrics_file(self) -> Path:
+        return self.journal.run_dir / 'metrics.json'
+
+    def write_metrics_summary(self, elapsed_seconds: float):
+        """Write the metrics of the run next to its task journal"""
+        self.metrics.write_summary(
+            self.metrics_file,
+            elapsed_seconds=round(elapsed_seconds, 3),
+            task_states=self.task_summary(),
+            # Submissions given up on, retried ones are not counted
+            failed_submissions=sum(1 for entry in self.dead_letters if entry['stage'] == 'submit'),
+            dead_letters=len(self.dead_letters),
+            first_submit_seconds=round(self.first_submit_seconds, 3) if self.first_submit_seconds is not None else None
+        )
+        submitted = self.metrics.counter_total('tasks_submitted_total')
+        self.log_message(f"Metrics: {submitted:g} tasks submitted in {elapsed_seconds:.1f} s, "
+                         f"{self.metrics.counter_total('tasks_completed_total'):g} completed, "
+                         f"{self.metrics.counter_total('tasks_failed_total'):g} failed, summary in {self.metrics_file}")
 
 
 def main():
-    """Example usage of TifDownloader"""
-    pass
+    """Resume an interrupted export run: python -m utils.tif_downloader --resume runs/<run_id>"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Resume an interrupted GEE export run")
+    parser.add_argument('--resume', required=True, metavar='RUN_DIR', help="Run directory containing journal.jsonl")
+    args = parser.parse_args()
+
+    downloader = TifDownloader.from_journal(args.resume)
+    downloader.initialize_ee()
+    downloader.resume()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,127 @@
+"""
+Background executor for the Tkinter GUI
+Runs blocking network calls on worker threads and delivers their results
+back on the Tk main thread through root.after
+"""
+
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+
+class BackgroundTask:
+    """Handle of a call running on the background executor"""
+
+    def __init__(self, name: str, on_success: Optional[Callable[[Any], None]] = None,
+                 on_error: Optional[Callable[[Exception], None]] = None):
+        self.name = name
+        self.on_success = on_success
+        self.on_error = on_error
+        self.future = None
+        self.cancelled = False
+
+    def cancel(self):
+        """Cancel the call; if it is already running its result is discarded"""
+        self.cancelled = True
+        if self.future is not None:
+            self.future.cancel()
+
+    def done(self) -> bool:
+        return self.future is not None and self.future.done()
+
+
+class TkExecutor:
+    """Thread pool whose results are handled on the Tk main thread"""
+
+    def __init__(self, root, max_workers: int = 4, poll_interval_ms: int = 50):
+        """
+        Initialize executor
+        Args:
+            root: Tk root window used to schedule result handling
+            max_workers: Number of worker threads
+            poll_interval_ms: Interval for handling finished calls on the Tk thread
+        """
+        self.root = root
+        self.poll_interval_ms = poll_interval_ms
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='gui-worker')
+        self._results = queue.Queue()
+        self._running = {}
+        self._closed = False
+        self.root.after(self.poll_interval_ms, self._drain)
+
+    def submit(self, name: str, fn: Callable, *args,
+               on_success: Optional[Callable[[Any], None]] = None,
+               on_error: Optional[Callable[[Exception], None]] = None, **kwargs) -> BackgroundTask:
+        """
+        Run fn(*args, **kwargs) on a worker thread
+        A previous call with the same name is cancelled, so only the latest result is handled
+        Args:
+            name: Name of the operation
+            fn: Blocking callable to run
+            on_success: Called on the Tk thread with the result
+            on_error: Called on the Tk thread with the raised exception
+        Returns:
+            BackgroundTask: Handle that can cancel the call
+        """
+        self.cancel(name)
+        task = BackgroundTask(name, on_success, on_error)
+        task.future = self._executor.submit(fn, *args, **kwargs)
+        task.future.add_done_callback(lambda future: self._results.put((task, None)))
+        self._running[name] = task
+        return task
+
+    def call_in_main(self, fn: Callable, *args):
+        """Schedule fn(*args) on the Tk thread, safe to call from any thread"""
+        self._results.put((None, (fn, args)))
+
+    def cancel(self, name: str):
+        """Cancel the running call with the given name, if any"""
+        task = self._running.pop(name, None)
+        if task is not None:
+            task.cancel()
+
+    def is_running(self, name: str) -> bool:
+        task = self._running.get(name)
+        return task is not None and not task.done()
+
+    def _drain(self):
+        """Handle finished calls on the Tk thread"""
+        while True:
+            try:
+                task, call = self._results.get_nowait()
+            except queue.Empty:
+                break
+
+            try:
+                if call is not None:
+                    fn, args = call
+                    fn(*args)
+                else:
+                    self._handle_result(task)
+            except Exception as e:
+                print(f"Error handling background result: {str(e)}")
+
+        if not self._closed:
+            self.root.after(self.poll_interval_ms, self._drain)
+
+    def _handle_result(self, task: BackgroundTask):
+        if self._running.get(task.name) is task:
+            del self._running[task.name]
+        if task.cancelled or task.future.cancelled():
+            return
+
+        error = task.future.exception()
+        if error is not None:
+            if task.on_error:
+                task.on_error(error)
+            else:
+                print(f"Background task {task.name} failed: {str(error)}")
+        elif task.on_success:
+            task.on_success(task.future.result())
+
+    def shutdown(self):
+        """Cancel pending calls and stop the worker threads"""
+        self._closed = True
+        for name in list(self._running):
+            self.cancel(name)
+        self._executor.shutdown(wait=False, cancel_futures=True)